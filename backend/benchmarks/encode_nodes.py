@@ -0,0 +1,124 @@
+"""
+Compare encode time and response size of the node list encodings.
+
+Nodes are generated in memory, so no database is needed.
+
+Usage: python benchmarks/encode_nodes.py [--nodes N]
+"""
+
+import argparse
+import gzip
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from api.db.tables.core import NodeAccessibility
+from api.db.tables.users import UserDisability
+from api.routes.core.encoding import NodeEncoding, nodes_payload, pack
+from api.routes.core.schemas import (
+    NodeAccessibilityPropositionSchema,
+    NodeCommentSchema,
+    NodeListAdapter,
+    NodeSchema,
+    UserSchema,
+)
+
+WORDS = "ramp step door lift toilet narrow wide entrance stairs kerb".split()
+
+
+def make_nodes(count: int, users_count: int) -> list[NodeSchema]:
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    users = [
+        UserSchema(
+            id=i,
+            email=f"user{i}@example.com",
+            disabilities=rng.sample(list(UserDisability), rng.randint(0, 2)),
+        )
+        for i in range(users_count)
+    ]
+
+    def text() -> str:
+        return " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))
+
+    def created_at() -> datetime:
+        return now - timedelta(seconds=rng.randint(0, 10**7))
+
+    ids = iter(range(10**9))
+
+    def make_node() -> NodeSchema:
+        comments = [
+            NodeCommentSchema(
+                id=next(ids),
+                user=rng.choice(users),
+                text=text(),
+                created_at=created_at(),
+            )
+            for _ in range(rng.randint(0, 6))
+        ]
+        propositions = [
+            NodeAccessibilityPropositionSchema(
+                id=next(ids),
+                user=rng.choice(users),
+                accessibility=rng.choice(list(NodeAccessibility)),
+                text=text(),
+                created_at=created_at(),
+            )
+            for _ in range(rng.randint(0, 3))
+        ]
+        return NodeSchema(
+            osm_id=f"node/{rng.randint(1, 10**10)}",
+            accessibility=rng.choice([None, *NodeAccessibility]),
+            lat=rng.uniform(-90, 90),
+            lon=rng.uniform(-180, 180),
+            comments=comments,
+            comments_count=len(comments),
+            accessibility_propositions=propositions,
+            accessibility_propositions_count=len(propositions),
+        )
+
+    return [make_node() for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    nodes = make_nodes(count=args.nodes, users_count=args.users)
+    encoders: dict[str, Callable[[], bytes]] = {
+        "JSONResponse": lambda: bytes(
+            JSONResponse(
+                content=TypeAdapter(list[NodeSchema]).dump_python(
+                    nodes, mode="json"
+                )
+            ).body
+        ),
+        "ORJSONResponse": lambda: bytes(
+            ORJSONResponse(content=NodeListAdapter.dump_python(nodes)).body
+        ),
+        "msgpack": lambda: pack(nodes_payload(nodes, NodeEncoding.MSGPACK)),
+        "msgpack columnar": lambda: pack(
+            nodes_payload(nodes, NodeEncoding.COLUMNAR)
+        ),
+    }
+
+    print(f"{args.nodes} nodes, {args.users} users, best of {args.repeat}")
+    print(f"{'encoding':<18}{'ms':>9}{'bytes':>12}{'gzip bytes':>12}")
+    for name, encode in encoders.items():
+        seconds = min(timeit.repeat(encode, number=1, repeat=args.repeat))
+        body = encode()
+        print(
+            f"{name:<18}{seconds * 1000:>9.1f}{len(body):>12}"
+            f"{len(gzip.compress(body)):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
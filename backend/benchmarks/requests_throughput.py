@@ -0,0 +1,77 @@
+"""
+Measure in-process request throughput of the API through its middlewares.
+
+Requests go straight to the ASGI app, so no server or database is needed:
+none of the paths reaches the database, and the authenticated one is
+rejected for lack of a token.
+
+Usage: python benchmarks/requests_throughput.py [--requests N] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from api.main import app
+
+PATHS = [
+    ("GET", "/api/disabilities"),
+    ("GET", "/api/not-found"),
+    ("GET", "/api/auth/me"),
+]
+
+
+async def measure(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    count: int,
+    repeat: int,
+) -> float:
+    """Best requests per second out of `repeat` rounds of `count`."""
+
+    # Warm up, so one-off costs are not measured.
+    for _ in range(100):
+        await client.request(method, path)
+
+    rates = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(count):
+            await client.request(method, path)
+        rates.append(count / (time.perf_counter() - started))
+    return max(rates)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+    ) as client:
+        print(f"best of {args.repeat} x {args.requests} requests")
+        print(f"{'request':<48}{'status':>7}{'req/s':>10}")
+        for method, path in PATHS:
+            response = await client.request(method, path)
+            rate = await measure(
+                client,
+                method,
+                path,
+                count=args.requests,
+                repeat=args.repeat,
+            )
+            print(
+                f"{method + ' ' + path:<48}{response.status_code:>7}"
+                f"{rate:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
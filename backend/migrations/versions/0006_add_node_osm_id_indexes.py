@@ -0,0 +1,43 @@
+"""Add osm_id indexes to node_comments and node_accessability_propositions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 10:41:12.512384
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("node_comments_osm_id_idx"),
+        "node_comments",
+        ["osm_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("node_accessability_propositions_osm_id_idx"),
+        "node_accessability_propositions",
+        ["osm_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("node_accessability_propositions_osm_id_idx"),
+        table_name="node_accessability_propositions",
+    )
+    op.drop_index(
+        op.f("node_comments_osm_id_idx"),
+        table_name="node_comments",
+    )
@@ -0,0 +1,45 @@
+"""Add locations to nodes, node_comments and node_accessability_propositions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 11:27:53.104821
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("node_comments", "node_accessability_propositions", "nodes")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column("lat", sa.Float(), nullable=True))
+        op.add_column(table, sa.Column("lon", sa.Float(), nullable=True))
+        op.create_index(
+            f"{table}_location_idx",
+            table,
+            [sa.text("point(lon, lat)")],
+            unique=False,
+            postgresql_using="gist",
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(
+            f"{table}_location_idx",
+            table_name=table,
+            postgresql_using="gist",
+        )
+        op.drop_column(table, "lon")
+        op.drop_column(table, "lat")
@@ -0,0 +1,68 @@
+"""Add node versions and node_tombstones table
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:16:05.731946
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("node_comments", "node_accessability_propositions", "nodes")
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("node_version_seq")))
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "version",
+                sa.BigInteger(),
+                server_default=sa.text("nextval('node_version_seq')"),
+                nullable=False,
+            ),
+        )
+        op.create_index(
+            op.f(f"{table}_version_idx"),
+            table,
+            ["version"],
+            unique=False,
+        )
+
+    op.create_table(
+        "node_tombstones",
+        sa.Column(
+            "version",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('node_version_seq')"),
+            nullable=False,
+        ),
+        sa.Column("osm_id", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("version", name=op.f("node_tombstones_pkey")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("node_tombstones")
+    for table in TABLES:
+        op.drop_index(op.f(f"{table}_version_idx"), table_name=table)
+        op.drop_column(table, "version")
+
+    op.execute(sa.schema.DropSequence(sa.Sequence("node_version_seq")))
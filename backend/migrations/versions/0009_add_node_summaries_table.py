@@ -0,0 +1,111 @@
+"""Add node_summaries table
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 13:02:44.218730
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _items(table: str, fields: str) -> str:
+    """Items of every node with their authors, latest first."""
+
+    return f"""
+        SELECT
+            {table}.osm_id,
+            array_agg(
+                json_build_object(
+                    'id', {table}.id,
+                    'user', json_build_object(
+                        'id', users.id,
+                        'email', users.email,
+                        'disabilities', users.disabilities
+                    ),
+                    {fields}
+                    'text', {table}.text,
+                    'created_at', {table}.created_at
+                )
+                ORDER BY {table}.created_at DESC
+            ) AS items,
+            max({table}.lat) AS lat,
+            max({table}.lon) AS lon
+        FROM {table}
+        JOIN users ON users.id = {table}.user_id
+        GROUP BY {table}.osm_id
+    """
+
+
+def upgrade() -> None:
+    op.create_table(
+        "node_summaries",
+        sa.Column("osm_id", sa.String(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lon", sa.Float(), nullable=True),
+        sa.Column(
+            "document",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("osm_id", name=op.f("node_summaries_pkey")),
+    )
+    op.create_index(
+        "node_summaries_location_idx",
+        "node_summaries",
+        [sa.text("point(lon, lat)")],
+        unique=False,
+        postgresql_using="gist",
+    )
+    # Same documents as `api.routes.core.services._select_node_summaries`.
+    comments = _items("node_comments", "")
+    propositions = _items(
+        "node_accessability_propositions",
+        "'accessibility', node_accessability_propositions.accessibility,",
+    )
+    op.execute(
+        f"""
+        INSERT INTO node_summaries (osm_id, lat, lon, document, updated_at)
+        SELECT osm_id, lat, lon, to_jsonb(summaries), now()
+        FROM (
+            SELECT
+                coalesce(
+                    nodes.osm_id,
+                    comments.osm_id,
+                    propositions.osm_id
+                ) AS osm_id,
+                nodes.accessibility,
+                coalesce(nodes.lat, comments.lat, propositions.lat) AS lat,
+                coalesce(nodes.lon, comments.lon, propositions.lon) AS lon,
+                coalesce(comments.items, '{{}}'::json[]) AS comments,
+                coalesce(propositions.items, '{{}}'::json[])
+                    AS accessibility_propositions
+            FROM nodes
+            FULL JOIN ({comments}) AS comments
+                ON comments.osm_id = nodes.osm_id
+            FULL JOIN ({propositions}) AS propositions
+                ON propositions.osm_id
+                    = coalesce(nodes.osm_id, comments.osm_id)
+        ) AS summaries
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "node_summaries_location_idx",
+        table_name="node_summaries",
+        postgresql_using="gist",
+    )
+    op.drop_table("node_summaries")
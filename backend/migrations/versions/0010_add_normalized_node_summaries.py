@@ -0,0 +1,75 @@
+"""Add normalized documents to node_summaries
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 14:21:07.531904
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _normalize(key: str) -> str:
+    return f"""
+        (
+            SELECT coalesce(
+                jsonb_agg(
+                    (item - 'user')
+                    || jsonb_build_object('user_id', item -> 'user' -> 'id')
+                    ORDER BY position
+                ),
+                '[]'::jsonb
+            )
+            FROM jsonb_array_elements(document -> '{key}')
+                WITH ORDINALITY AS items(item, position)
+        )
+    """
+
+
+def upgrade() -> None:
+    op.add_column(
+        "node_summaries",
+        sa.Column(
+            "normalized_document",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "node_summaries",
+        sa.Column("user_ids", postgresql.ARRAY(sa.Integer()), nullable=True),
+    )
+    op.execute(
+        f"""
+        UPDATE node_summaries SET
+            normalized_document = document || jsonb_build_object(
+                'comments', {_normalize("comments")},
+                'accessibility_propositions',
+                {_normalize("accessibility_propositions")}
+            ),
+            user_ids = ARRAY(
+                SELECT DISTINCT (item -> 'user' ->> 'id')::integer
+                FROM jsonb_array_elements(
+                    (document -> 'comments')
+                    || (document -> 'accessibility_propositions')
+                ) AS items(item)
+            )
+        """
+    )
+    op.alter_column("node_summaries", "normalized_document", nullable=False)
+    op.alter_column("node_summaries", "user_ids", nullable=False)
+
+
+def downgrade() -> None:
+    op.drop_column("node_summaries", "user_ids")
+    op.drop_column("node_summaries", "normalized_document")
@@ -0,0 +1,86 @@
+"""Cap embedded node items and index them for keyset pagination
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 15:07:39.802113
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match `EMBEDDED_ITEMS_LIMIT` in `api.routes.core.services`.
+EMBEDDED_ITEMS_LIMIT = 20
+
+
+def _cap(column: str, key: str) -> str:
+    return f"""
+        '{key}_count', jsonb_array_length({column} -> '{key}'),
+        '{key}', (
+            SELECT coalesce(jsonb_agg(item ORDER BY position), '[]'::jsonb)
+            FROM jsonb_array_elements({column} -> '{key}')
+                WITH ORDINALITY AS items(item, position)
+            WHERE position <= {EMBEDDED_ITEMS_LIMIT}
+        )
+    """
+
+
+def upgrade() -> None:
+    for table in ["node_comments", "node_accessability_propositions"]:
+        op.drop_index(op.f(f"{table}_osm_id_idx"), table_name=table)
+        op.create_index(
+            f"{table}_osm_id_created_at_id_idx",
+            table,
+            ["osm_id", sa.text("created_at DESC"), sa.text("id DESC")],
+            unique=False,
+        )
+
+    # Summary arrays are already ordered from the latest item.
+    op.execute(
+        f"""
+        UPDATE node_summaries SET
+            document = document || jsonb_build_object(
+                {_cap("document", "comments")},
+                {_cap("document", "accessibility_propositions")}
+            ),
+            normalized_document = normalized_document || jsonb_build_object(
+                {_cap("normalized_document", "comments")},
+                {_cap("normalized_document", "accessibility_propositions")}
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE node_summaries SET user_ids = ARRAY(
+            SELECT DISTINCT (item ->> 'user_id')::integer
+            FROM jsonb_array_elements(
+                (normalized_document -> 'comments')
+                || (normalized_document -> 'accessibility_propositions')
+            ) AS items(item)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    # Summaries keep their capped arrays, run the rebuild_node_summaries
+    # command to restore the full ones.
+    for table in ["node_comments", "node_accessability_propositions"]:
+        op.drop_index(
+            f"{table}_osm_id_created_at_id_idx",
+            table_name=table,
+        )
+        op.create_index(
+            op.f(f"{table}_osm_id_idx"),
+            table,
+            ["osm_id"],
+            unique=False,
+        )
@@ -0,0 +1,61 @@
+"""Add prediction_jobs table
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 15:48:21.660137
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "prediction_jobs",
+        sa.Column("osm_id", sa.String(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lon", sa.Float(), nullable=True),
+        sa.Column(
+            "attempts",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column(
+            "requested_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "run_after",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("osm_id", name=op.f("prediction_jobs_pkey")),
+    )
+    op.create_index(
+        op.f("prediction_jobs_run_after_idx"),
+        "prediction_jobs",
+        ["run_after"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("prediction_jobs_run_after_idx"),
+        table_name="prediction_jobs",
+    )
+    op.drop_table("prediction_jobs")
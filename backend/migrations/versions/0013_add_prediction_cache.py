@@ -0,0 +1,48 @@
+"""Add prediction_cache table
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 16:22:53.104476
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "prediction_cache",
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column(
+            "accessibility",
+            postgresql.ENUM(
+                "full",
+                "partial",
+                "none",
+                name="node_accessibility",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("key", name=op.f("prediction_cache_pkey")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("prediction_cache")
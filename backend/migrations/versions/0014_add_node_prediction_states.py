@@ -0,0 +1,112 @@
+"""Add node_prediction_states table
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18 17:05:39.218406
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0014"
+down_revision: Union[str, None] = "0013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "node_prediction_states",
+        sa.Column("osm_id", sa.String(), nullable=False),
+        sa.Column(
+            "accessibility",
+            postgresql.ENUM(
+                "full",
+                "partial",
+                "none",
+                name="node_accessibility",
+                create_type=False,
+            ),
+            nullable=True,
+        ),
+        sa.Column(
+            "comment_watermark",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column(
+            "full_votes",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column(
+            "partial_votes",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column(
+            "none_votes",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint(
+            "osm_id",
+            name=op.f("node_prediction_states_pkey"),
+        ),
+    )
+    # Existing levels were predicted from all the comments of their node.
+    op.execute(
+        """
+        INSERT INTO node_prediction_states (
+            osm_id,
+            accessibility,
+            comment_watermark,
+            full_votes,
+            partial_votes,
+            none_votes
+        )
+        SELECT
+            ids.osm_id,
+            nodes.accessibility,
+            coalesce(comments.watermark, 0),
+            coalesce(votes.full_votes, 0),
+            coalesce(votes.partial_votes, 0),
+            coalesce(votes.none_votes, 0)
+        FROM (
+            SELECT osm_id FROM nodes
+            UNION
+            SELECT osm_id FROM node_comments
+            UNION
+            SELECT osm_id FROM node_accessability_propositions
+        ) AS ids
+        LEFT JOIN nodes ON nodes.osm_id = ids.osm_id
+        LEFT JOIN (
+            SELECT osm_id, max(id) AS watermark
+            FROM node_comments
+            GROUP BY osm_id
+        ) AS comments ON comments.osm_id = ids.osm_id
+        LEFT JOIN (
+            SELECT
+                osm_id,
+                count(*) FILTER (WHERE accessibility = 'full') AS full_votes,
+                count(*) FILTER (WHERE accessibility = 'partial')
+                    AS partial_votes,
+                count(*) FILTER (WHERE accessibility = 'none') AS none_votes
+            FROM node_accessability_propositions
+            GROUP BY osm_id
+        ) AS votes ON votes.osm_id = ids.osm_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("node_prediction_states")
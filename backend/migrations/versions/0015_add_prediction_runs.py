@@ -0,0 +1,49 @@
+"""Add prediction_runs table
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-18 17:48:02.513920
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0015"
+down_revision: Union[str, None] = "0014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "prediction_runs",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("last_osm_id", sa.String(), nullable=True),
+        sa.Column(
+            "predicted",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+        sa.Column(
+            "started_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("name", name=op.f("prediction_runs_pkey")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("prediction_runs")
@@ -0,0 +1,34 @@
+"""Add revision to node_prediction_states
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-18 19:12:26.730415
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0016"
+down_revision: Union[str, None] = "0015"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "node_prediction_states",
+        sa.Column(
+            "revision",
+            sa.Integer(),
+            server_default=sa.text("0"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("node_prediction_states", "revision")
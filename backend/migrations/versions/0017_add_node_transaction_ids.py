@@ -0,0 +1,100 @@
+"""Replace node versions with the ids of the writing transactions
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-18 20:03:41.905127
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0017"
+down_revision: Union[str, None] = "0016"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("node_comments", "node_accessability_propositions", "nodes")
+# Must match `CURRENT_XACT_ID` in `api.db.tables.core`.
+CURRENT_XACT_ID = "(pg_current_xact_id()::text)::bigint"
+
+
+def upgrade() -> None:
+    # Existing rows get this migration's transaction id, so clients holding
+    # a version token from before get them all again.
+    for table in (*TABLES, "node_tombstones"):
+        op.add_column(
+            table,
+            sa.Column(
+                "xact_id",
+                sa.BigInteger(),
+                server_default=sa.text(CURRENT_XACT_ID),
+                nullable=False,
+            ),
+        )
+        op.create_index(
+            op.f(f"{table}_xact_id_idx"),
+            table,
+            ["xact_id"],
+            unique=False,
+        )
+
+    for table in TABLES:
+        op.drop_index(op.f(f"{table}_version_idx"), table_name=table)
+        op.drop_column(table, "version")
+
+    op.drop_constraint(
+        op.f("node_tombstones_pkey"),
+        "node_tombstones",
+        type_="primary",
+    )
+    op.drop_column("node_tombstones", "version")
+    op.add_column(
+        "node_tombstones",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+    )
+    op.create_primary_key(
+        op.f("node_tombstones_pkey"),
+        "node_tombstones",
+        ["id"],
+    )
+    op.execute(sa.schema.DropSequence(sa.Sequence("node_version_seq")))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("node_version_seq")))
+    op.drop_constraint(
+        op.f("node_tombstones_pkey"),
+        "node_tombstones",
+        type_="primary",
+    )
+    op.drop_column("node_tombstones", "id")
+    for table in (*TABLES, "node_tombstones"):
+        op.add_column(
+            table,
+            sa.Column(
+                "version",
+                sa.BigInteger(),
+                server_default=sa.text("nextval('node_version_seq')"),
+                nullable=False,
+            ),
+        )
+        op.drop_index(op.f(f"{table}_xact_id_idx"), table_name=table)
+        op.drop_column(table, "xact_id")
+
+    for table in TABLES:
+        op.create_index(
+            op.f(f"{table}_version_idx"),
+            table,
+            ["version"],
+            unique=False,
+        )
+    op.create_primary_key(
+        op.f("node_tombstones_pkey"),
+        "node_tombstones",
+        ["version"],
+    )
@@ -0,0 +1,33 @@
+"""Index prediction_cache by creation time
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-18 20:41:17.530862
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0018"
+down_revision: Union[str, None] = "0017"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("prediction_cache_created_at_idx"),
+        "prediction_cache",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("prediction_cache_created_at_idx"),
+        table_name="prediction_cache",
+    )
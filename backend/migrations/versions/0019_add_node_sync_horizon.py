@@ -0,0 +1,47 @@
+"""Add node_sync_horizon table and index node_tombstones by creation time
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-18 21:02:36.418290
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0019"
+down_revision: Union[str, None] = "0018"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "node_sync_horizon",
+        sa.Column("id", sa.Boolean(), nullable=False),
+        sa.Column("min_token", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("node_sync_horizon_pkey")),
+    )
+    op.create_index(
+        op.f("node_tombstones_created_at_idx"),
+        "node_tombstones",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("node_tombstones_created_at_idx"),
+        table_name="node_tombstones",
+    )
+    op.drop_table("node_sync_horizon")
@@ -0,0 +1,90 @@
+"""
+Serve a stub of the OpenAI chat completions API.
+
+Answers every completion with a random accessibility level, or with a JSON
+object of levels for batched prompts, after `--latency` seconds, and fails
+a `--fail-rate` share of requests with 503 so retries and the circuit
+breaker can be exercised. Point the API at it with
+`OPENAI_BASE_URL=http://localhost:<port>/v1`.
+
+Usage: python -m api.commands.openai_stub [--port P] [--latency S]
+    [--fail-rate R]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from api.db.tables.core import NodeAccessibility
+
+
+def create_app(latency: float, fail_rate: float) -> Starlette:
+    async def chat_completions(request: Request) -> JSONResponse:
+        body = await request.json()
+        await asyncio.sleep(latency)
+        if random.random() < fail_rate:
+            return JSONResponse(
+                content={"error": {"message": "Stub failure"}},
+                status_code=503,
+            )
+
+        prompt = body["messages"][-1]["content"]
+        answer = _answer(prompt)
+        return JSONResponse(
+            content={
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+        )
+
+    return Starlette(
+        routes=[
+            Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        ]
+    )
+
+
+def _answer(prompt: str) -> str:
+    def level() -> str:
+        return random.choice(list(NodeAccessibility)).value.upper()
+
+    # Batched prompts end with a JSON object of descriptions by id.
+    try:
+        items = json.loads(prompt.strip().splitlines()[-1])
+    except ValueError:
+        items = None
+    if isinstance(items, dict):
+        return json.dumps({id: level() for id in items})
+    return level()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    app = create_app(latency=args.latency, fail_rate=args.fail_rate)
+    uvicorn.run(app, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+Recompute every node summary from the source tables.
+
+Usage: python -m api.commands.rebuild_node_summaries
+"""
+
+import asyncio
+
+from api.routes.core.services import rebuild_node_summaries
+from api.state import db_engine
+
+
+async def main() -> None:
+    async with db_engine.connect() as db_conn:
+        count = await rebuild_node_summaries(db_conn=db_conn)
+
+    await db_engine.dispose()
+    print(f"Rebuilt {count} node summaries")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
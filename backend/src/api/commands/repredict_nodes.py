@@ -0,0 +1,140 @@
+"""
+Re-predict the accessibility of every node with comments, e.g. after the
+prediction prompt or model changed.
+
+Nodes are walked in `osm_id` order a page at a time. Every page is predicted
+with bounded concurrency and written in a single transaction together with
+the run's checkpoint, so a run started again under the same name resumes
+after the last written page. The default name changes with the model and
+the prompts.
+
+A node whose prediction fails is retried with backoff, then skipped, and
+listed at the end of the run.
+
+Usage: python -m api.commands.repredict_nodes [--run NAME]
+    [--concurrency N] [--page-size N]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import timedelta
+
+from api.common.llm import LLMUnavailableError
+from api.routes.core import services
+from api.routes.core.predictions import prediction_key
+from api.routes.core.schemas import NodePredictionSchema
+from api.state import db_engine, llm_client
+
+# Retries of a node whose prediction failed, the first after
+# `RETRY_DELAY` seconds, doubling every time.
+RETRIES = 3
+RETRY_DELAY = 15
+
+
+def default_run_name() -> str:
+    version = prediction_key(
+        text="",
+        model=services.PREDICTION_MODEL,
+        prompt=services.PREDICTION_PROMPT + services.PREDICTION_BATCH_PROMPT,
+    )
+    return f"{services.PREDICTION_MODEL}-{version[:12]}"
+
+
+async def repredict_nodes(
+    run_name: str,
+    concurrency: int,
+    page_size: int,
+) -> None:
+    async with db_engine.connect() as db_conn:
+        run = await services.start_prediction_run(
+            db_conn=db_conn,
+            name=run_name,
+        )
+        total = await services.count_nodes_to_repredict(
+            db_conn=db_conn,
+            after=run.last_osm_id,
+        )
+    print(
+        f"Run {run.name}: {run.predicted} nodes re-predicted before, "
+        f"{total} left"
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed: list[str] = []
+
+    async def repredict(osm_id: str) -> NodePredictionSchema | None:
+        for attempt in range(RETRIES + 1):
+            try:
+                async with semaphore:
+                    return await services.repredict_node(
+                        db_engine=db_engine,
+                        osm_id=osm_id,
+                    )
+            except (LLMUnavailableError, ValueError) as e:
+                if attempt == RETRIES:
+                    print(f"Node {osm_id} failed, skipping it: {e!r}")
+                    failed.append(osm_id)
+                    return None
+
+                await asyncio.sleep(RETRY_DELAY * 2**attempt)
+
+    after = run.last_osm_id
+    done = 0
+    started = time.monotonic()
+    while True:
+        async with db_engine.connect() as db_conn:
+            osm_ids = await services.list_nodes_to_repredict(
+                db_conn=db_conn,
+                after=after,
+                limit=page_size,
+            )
+        if not osm_ids:
+            break
+
+        # Unexpected errors stop the run, cancelling the rest of the page.
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [
+                task_group.create_task(repredict(osm_id)) for osm_id in osm_ids
+            ]
+        predictions = [task.result() for task in tasks]
+        async with db_engine.connect() as db_conn:
+            await services.save_repredictions(
+                db_conn=db_conn,
+                run_name=run.name,
+                last_osm_id=osm_ids[-1],
+                predictions=[p for p in predictions if p is not None],
+            )
+
+        after = osm_ids[-1]
+        done += len(osm_ids)
+        rate = done / (time.monotonic() - started)
+        eta = timedelta(seconds=round(max(total - done, 0) / rate))
+        print(f"{done}/{total} nodes, {rate:.1f} nodes/s, ETA {eta}")
+
+    if failed:
+        print(f"Run {run.name} is complete, except for nodes {failed}")
+    else:
+        print(f"Run {run.name} is complete")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--run", default=default_run_name())
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--page-size", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        await repredict_nodes(
+            run_name=args.run,
+            concurrency=args.concurrency,
+            page_size=args.page_size,
+        )
+    finally:
+        await llm_client.close()
+        await db_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
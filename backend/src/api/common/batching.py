@@ -0,0 +1,78 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Group concurrent calls into batches.
+
+    A batch is handled once `max_size` items are waiting, or `max_wait`
+    seconds after its first item arrived, whichever comes first. `handle`
+    gets the items in arrival order and returns one result per item, or the
+    exception to raise to that item's caller; if it raises, every caller in
+    the batch gets the exception. Items whose caller was cancelled before
+    the batch left are dropped from it.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[list[T]], Awaitable[list[R | Exception]]],
+        max_size: int,
+        max_wait: float,
+    ) -> None:
+        self.handle = handle
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending: list[tuple[T, asyncio.Future[R]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = [
+            (item, future)
+            for item, future in self._pending
+            if not future.done()
+        ]
+        self._pending = []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            # The loop only keeps weak references to tasks.
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future[R]]]) -> None:
+        futures = [future for _, future in batch]
+        try:
+            results = await self.handle([item for item, _ in batch])
+            for future, result in zip(futures, results, strict=True):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,200 @@
+import asyncio
+import gzip
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable
+
+import brotli
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Smaller bodies are not worth compressing.
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    # Compressed versions of `body` by content coding.
+    compressed: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(map(len, self.compressed.values()))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def compress(body: bytes) -> dict[str, bytes]:
+    if len(body) < COMPRESS_MIN_SIZE:
+        return {}
+
+    return {
+        "br": brotli.compress(body, quality=BROTLI_QUALITY),
+        "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL),
+    }
+
+
+def negotiate_content_coding(
+    accept_encoding: str,
+    available: list[str],
+) -> str | None:
+    """
+    Pick the `available` content coding the client prefers, or `None` to
+    send the body as is.
+
+    Ties go to the first coding in `available`.
+    """
+
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding.lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def cached_response(
+    request: Request,
+    cached: CachedResponse,
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Respond with `cached`, compressed if the client accepts it, or with 304
+    if the client already has it.
+    """
+
+    coding = negotiate_content_coding(
+        accept_encoding=request.headers.get("Accept-Encoding", ""),
+        available=list(cached.compressed),
+    )
+    # Every representation needs its own strong ETag.
+    etag = cached.etag if coding is None else f'{cached.etag[:-1]}-{coding}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if_none_match = request.headers.get("If-None-Match", "")
+    etags = {
+        etag.strip().removeprefix("W/") for etag in if_none_match.split(",")
+    }
+    if etag in etags or "*" in etags:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=headers,
+        )
+
+    if coding is None:
+        body = cached.body
+    else:
+        body = cached.compressed[coding]
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+class ResponseCache:
+    """
+    Bounded in-process cache of rendered response bodies.
+
+    Bodies are compressed once when they are stored, so serving them
+    compressed costs nothing more. Concurrent misses for the same key share
+    a single computation. Calling `invalidate` drops every entry;
+    computations still running at that point answer the callers already
+    waiting for them but are not stored, and later callers start a fresh
+    one.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._size = 0
+        self._generation = 0
+        self._inflight: dict[
+            tuple[int, Hashable], asyncio.Future[CachedResponse]
+        ] = {}
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[bytes]],
+    ) -> CachedResponse:
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return cached
+
+        flight_key = (self._generation, key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(flight_key, compute))
+            self._inflight[flight_key] = task
+
+        # A cancelled caller must not cancel the computation other callers
+        # are waiting for.
+        return await asyncio.shield(task)
+
+    async def _compute(
+        self,
+        flight_key: tuple[int, Hashable],
+        compute: Callable[[], Awaitable[bytes]],
+    ) -> CachedResponse:
+        try:
+            body = await compute()
+        finally:
+            self._inflight.pop(flight_key, None)
+
+        # Compression releases the GIL, so it does not block the event loop.
+        compressed = await asyncio.to_thread(compress, body)
+        cached = CachedResponse(
+            body=body,
+            etag=make_etag(body),
+            compressed=compressed,
+        )
+        generation, key = flight_key
+        if generation == self._generation:
+            self._store(key, cached)
+        return cached
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._size = 0
+
+    def _store(self, key: Hashable, cached: CachedResponse) -> None:
+        if cached.size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous.size
+
+        self._entries[key] = cached
+        self._size += cached.size
+        while (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import random
+import time
+
+from openai import APIConnectionError, APIStatusError, AsyncClient
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailableError(Exception):
+    """The provider is failing, so the call was not made or gave up."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a provider after `failure_threshold` failures in a row.
+
+    Once open, calls fail right away for `reset_timeout` seconds. Then a
+    single trial call is let through: success closes the circuit again,
+    failure keeps it open for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def acquire(self) -> bool:
+        """
+        Raise `LLMUnavailableError` unless a call may be made now.
+
+        Returns whether the call is the trial one, which must be released
+        once it is over.
+        """
+
+        if self._opened_at is None:
+            return False
+
+        waited = time.monotonic() - self._opened_at
+        if waited < self.reset_timeout or self._trial_running:
+            raise LLMUnavailableError("Circuit breaker is open")
+        self._trial_running = True
+        return True
+
+    def release(self) -> None:
+        """
+        End the trial call, so the next one may be let through even if it
+        neither succeeded nor failed, e.g. because it was cancelled.
+        """
+
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_running or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning("Circuit breaker opened")
+            self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LLMClient:
+    """
+    Chat completion client shared by the whole process.
+
+    Keeps one connection pool, bounds the number of requests in flight,
+    retries rate limits, server errors and timeouts with jittered
+    exponential backoff, and fails fast through a circuit breaker while
+    the provider is down.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None,
+        max_concurrency: int,
+        timeout: float,
+        max_retries: int,
+        retry_delay: float,
+        breaker: CircuitBreaker,
+    ) -> None:
+        # Retries are ours, so they go through the circuit breaker.
+        self._client = AsyncClient(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.breaker = breaker
+
+    async def complete(self, model: str, prompt: str) -> str:
+        """Return the model's answer to a single user message."""
+
+        attempt = 0
+        while True:
+            trial = self.breaker.acquire()
+            try:
+                async with self._semaphore:
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                    )
+            except (APIConnectionError, APIStatusError) as e:
+                if isinstance(e, APIStatusError) and not _is_transient(e):
+                    raise
+
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise LLMUnavailableError(str(e)) from e
+            else:
+                self.breaker.record_success()
+                content = response.choices[0].message.content
+                assert content is not None
+                return content
+            finally:
+                # Whichever way the trial ended, the circuit must not stay
+                # open for good waiting for it.
+                if trial:
+                    self.breaker.release()
+
+            # Full jitter, so clients retrying together spread out.
+            await asyncio.sleep(
+                random.uniform(0, self.retry_delay * 2**attempt)
+            )
+            attempt += 1
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+def _is_transient(error: APIStatusError) -> bool:
+    return error.status_code == 429 or error.status_code >= 500
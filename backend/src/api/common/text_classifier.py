@@ -0,0 +1,95 @@
+import math
+import random
+import re
+from collections import defaultdict
+from typing import Iterable, Self, Sequence
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def extract_features(text: str) -> set[str]:
+    """Words and word pairs, so "no ramp" and "ramp" are told apart."""
+
+    words = _WORD_RE.findall(text.lower())
+    pairs = (f"{a} {b}" for a, b in zip(words, words[1:]))
+    return {*words, *pairs}
+
+
+class LinearClassifier:
+    """
+    Multinomial logistic regression over word features.
+
+    Small enough to be trained from our own comments and propositions in a
+    few seconds, and to classify in microseconds. Training runs in a spawned
+    process, which imports this module only, so it imports nothing from the
+    app.
+    """
+
+    def __init__(
+        self,
+        labels: list[str],
+        weights: dict[str, list[float]],
+        bias: list[float],
+        examples: int,
+    ) -> None:
+        self.labels = labels
+        self.weights = weights
+        self.bias = bias
+        self.examples = examples
+
+    @classmethod
+    def fit(
+        cls,
+        examples: Iterable[tuple[str, str]],
+        labels: Sequence[str],
+        epochs: int = 10,
+        learning_rate: float = 0.1,
+    ) -> Self:
+        """
+        Train with stochastic gradient descent, deterministically, on
+        `(text, label)` pairs whose labels are all in `labels`.
+        """
+
+        samples = [
+            (extract_features(text), labels.index(label))
+            for text, label in examples
+        ]
+        classifier = cls(
+            labels=list(labels),
+            weights=defaultdict(lambda: [0.0] * len(labels)),
+            bias=[0.0] * len(labels),
+            examples=len(samples),
+        )
+        rng = random.Random(0)
+        for _ in range(epochs):
+            rng.shuffle(samples)
+            for features, label in samples:
+                probabilities = classifier._probabilities(features)
+                for level, probability in enumerate(probabilities):
+                    step = learning_rate * (probability - (level == label))
+                    classifier.bias[level] -= step
+                    for feature in features:
+                        classifier.weights[feature][level] -= step
+
+        classifier.weights = dict(classifier.weights)
+        return classifier
+
+    def classify(self, text: str) -> tuple[str, float]:
+        """The most likely label of `text`, with its probability."""
+
+        probabilities = self._probabilities(extract_features(text))
+        confidence = max(probabilities)
+        return self.labels[probabilities.index(confidence)], confidence
+
+    def _probabilities(self, features: set[str]) -> list[float]:
+        scores = list(self.bias)
+        for feature in features:
+            weights = self.weights.get(feature)
+            if weights is not None:
+                for level, weight in enumerate(weights):
+                    scores[level] += weight
+
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [exp / total for exp in exps]
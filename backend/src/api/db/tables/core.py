@@ -1,11 +1,28 @@
 from enum import StrEnum
+from typing import Any
 
+from sqlalchemy import BigInteger, Identity, Index, Integer, text
 from sqlalchemy import ForeignKey as Fk
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import Mapped, MappedColumn, mapped_column
 
-from .base import EnumMixin, TableBase, strpk, timestamptz_now
+from ..utils import point
+from .base import EnumMixin, TableBase, strpk, timestamptz, timestamptz_now
 from .users import User, intpk
 
+# Id of the current transaction as a plain integer. Node tables record the
+# transaction that last wrote every row, and sync tokens are transaction ids
+# that every earlier transaction had finished by.
+CURRENT_XACT_ID = "(pg_current_xact_id()::text)::bigint"
+
+
+def xact_id_column(**kwargs: Any) -> MappedColumn[Any]:
+    return mapped_column(
+        BigInteger,
+        server_default=text(CURRENT_XACT_ID),
+        **kwargs,
+    )
+
 
 class NodeComment(TableBase):
     __tablename__ = "node_comments"
@@ -14,9 +31,26 @@ class NodeComment(TableBase):
     osm_id: Mapped[str]
     user_id: Mapped[int] = mapped_column(Fk(User.id, ondelete="CASCADE"))
     text: Mapped[str]
+    lat: Mapped[float | None]
+    lon: Mapped[float | None]
+    xact_id: Mapped[int] = xact_id_column(index=True)
     created_at: Mapped[timestamptz_now]
 
 
+# Serves both lookups by osm_id and keyset pagination of a node's comments.
+Index(
+    "node_comments_osm_id_created_at_id_idx",
+    NodeComment.osm_id,
+    NodeComment.created_at.desc(),
+    NodeComment.id.desc(),
+)
+Index(
+    "node_comments_location_idx",
+    point(lon=NodeComment.lon, lat=NodeComment.lat),
+    postgresql_using="gist",
+)
+
+
 class NodeAccessibility(EnumMixin, StrEnum):
     FULL = "full"
     PARTIAL = "partial"
@@ -31,11 +65,163 @@ class NodeAccessibilityProposition(TableBase):
     user_id: Mapped[int] = mapped_column(Fk(User.id, ondelete="CASCADE"))
     text: Mapped[str]
     accessibility: Mapped[NodeAccessibility]
+    lat: Mapped[float | None]
+    lon: Mapped[float | None]
+    xact_id: Mapped[int] = xact_id_column(index=True)
     created_at: Mapped[timestamptz_now]
 
 
+Index(
+    "node_accessability_propositions_osm_id_created_at_id_idx",
+    NodeAccessibilityProposition.osm_id,
+    NodeAccessibilityProposition.created_at.desc(),
+    NodeAccessibilityProposition.id.desc(),
+)
+Index(
+    "node_accessability_propositions_location_idx",
+    point(
+        lon=NodeAccessibilityProposition.lon,
+        lat=NodeAccessibilityProposition.lat,
+    ),
+    postgresql_using="gist",
+)
+
+
 class Node(TableBase):
     __tablename__ = "nodes"
 
     osm_id: Mapped[strpk]
     accessibility: Mapped[NodeAccessibility]
+    lat: Mapped[float | None]
+    lon: Mapped[float | None]
+    xact_id: Mapped[int] = xact_id_column(index=True)
+
+
+Index(
+    "nodes_location_idx",
+    point(lon=Node.lon, lat=Node.lat),
+    postgresql_using="gist",
+)
+
+
+class NodeTombstone(TableBase):
+    """Marks that a comment or proposition of the node was deleted."""
+
+    __tablename__ = "node_tombstones"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    osm_id: Mapped[str]
+    xact_id: Mapped[int] = xact_id_column(index=True)
+    # Tombstones are pruned after `NODE_TOMBSTONES_RETENTION_DAYS`.
+    created_at: Mapped[timestamptz_now] = mapped_column(index=True)
+
+
+class NodeSyncHorizon(TableBase):
+    """
+    Oldest sync token changes can still be listed since, in a single row.
+
+    Older tokens may predate tombstones that were pruned since, so the
+    deletions they would have listed are lost.
+    """
+
+    __tablename__ = "node_sync_horizon"
+
+    id: Mapped[bool] = mapped_column(primary_key=True, default=True)
+    min_token: Mapped[int] = mapped_column(BigInteger)
+    updated_at: Mapped[timestamptz_now]
+
+
+class PredictionJob(TableBase):
+    """
+    Pending re-prediction of a node's accessibility.
+
+    There is at most one job per node: requesting a prediction for a node
+    that already has a pending job only moves its `requested_at` forward.
+    """
+
+    __tablename__ = "prediction_jobs"
+
+    osm_id: Mapped[strpk]
+    lat: Mapped[float | None]
+    lon: Mapped[float | None]
+    attempts: Mapped[int] = mapped_column(server_default=text("0"))
+    requested_at: Mapped[timestamptz_now]
+    run_after: Mapped[timestamptz_now] = mapped_column(index=True)
+    # Set while a worker is running the job, so others skip it.
+    locked_until: Mapped[timestamptz | None]
+
+
+class NodePredictionState(TableBase):
+    """
+    What the last accessibility prediction of a node was based on.
+
+    The next prediction starts from it and only reads the comments newer
+    than `comment_watermark`, so its cost does not grow with the node's
+    history.
+    """
+
+    __tablename__ = "node_prediction_states"
+
+    osm_id: Mapped[strpk]
+    # `None` makes the next prediction start over from the latest comments.
+    accessibility: Mapped[NodeAccessibility | None]
+    # Id of the newest comment the prediction is based on.
+    comment_watermark: Mapped[int] = mapped_column(server_default=text("0"))
+    # Propositions per accessibility level.
+    full_votes: Mapped[int] = mapped_column(server_default=text("0"))
+    partial_votes: Mapped[int] = mapped_column(server_default=text("0"))
+    none_votes: Mapped[int] = mapped_column(server_default=text("0"))
+    # Bumped whenever a comment of the node is deleted, so a prediction that
+    # may have read it is not saved over the reset state.
+    revision: Mapped[int] = mapped_column(server_default=text("0"))
+
+
+class PredictionRun(TableBase):
+    """Checkpoint of a bulk re-prediction of every node, so it can resume."""
+
+    __tablename__ = "prediction_runs"
+
+    name: Mapped[strpk]
+    # Every node up to this one, in `osm_id` order, was re-predicted.
+    last_osm_id: Mapped[str | None]
+    predicted: Mapped[int] = mapped_column(server_default=text("0"))
+    started_at: Mapped[timestamptz_now]
+    updated_at: Mapped[timestamptz_now]
+
+
+class PredictionCacheEntry(TableBase):
+    """Accessibility predicted for a prompt, keyed by the prompt's hash."""
+
+    __tablename__ = "prediction_cache"
+
+    key: Mapped[strpk]
+    accessibility: Mapped[NodeAccessibility]
+    # Entries expire, see `PREDICTION_CACHE_TTL_DAYS`.
+    created_at: Mapped[timestamptz_now] = mapped_column(index=True)
+
+
+class NodeSummary(TableBase):
+    """
+    Ready-to-serve document of a node with its comments and propositions.
+
+    Kept up to date by the node write paths and rebuilt from the source
+    tables by the `rebuild_node_summaries` command.
+    """
+
+    __tablename__ = "node_summaries"
+
+    osm_id: Mapped[strpk]
+    lat: Mapped[float | None]
+    lon: Mapped[float | None]
+    document: Mapped[dict[str, Any]] = mapped_column(JSONB)
+    # Same as `document`, but referencing users by `user_id`.
+    normalized_document: Mapped[dict[str, Any]] = mapped_column(JSONB)
+    user_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer))
+    updated_at: Mapped[timestamptz]
+
+
+Index(
+    "node_summaries_location_idx",
+    point(lon=NodeSummary.lon, lat=NodeSummary.lat),
+    postgresql_using="gist",
+)
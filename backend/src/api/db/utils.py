@@ -1,6 +1,16 @@
 from typing import Any
 
-from sqlalchemy import JSON, URL, ColumnElement, Function, func, make_url, sql
+from sqlalchemy import (
+    JSON,
+    URL,
+    Boolean,
+    ColumnElement,
+    Float,
+    Function,
+    func,
+    make_url,
+    sql,
+)
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql.type_api import TypeEngine
 
@@ -17,3 +27,31 @@ def json_build_object(values: dict[Any, Any]) -> Function[Any]:
 
 def empty_array(tp: type[TypeEngine] = JSON) -> ColumnElement:
     return sql.cast(sql.literal("{}"), ARRAY(tp))
+
+
+def point(lon: Any, lat: Any) -> Function[Any]:
+    """Build a built-in Postgres `point`, indexable with GiST."""
+    return func.point(lon, lat)
+
+
+def within_bbox(
+    lon: Any,
+    lat: Any,
+    west: float,
+    south: float,
+    east: float,
+    north: float,
+) -> ColumnElement[bool]:
+    bbox = func.box(point(lon=west, lat=south), point(lon=east, lat=north))
+    return point(lon=lon, lat=lat).op("<@", return_type=Boolean)(bbox)
+
+
+def distance(
+    a: ColumnElement[Any], b: ColumnElement[Any]
+) -> ColumnElement[float]:
+    """
+    Distance between two points.
+
+    Ordering by it lets Postgres walk a GiST index in nearest-first order.
+    """
+    return a.op("<->", return_type=Float)(b)
@@ -1,11 +1,82 @@
+import asyncio
+import contextlib
+from datetime import timedelta
+from typing import AsyncIterator
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .middlewares import JWTAuthenticationMiddleware
 from .routes import router
+from .routes.core.jobs import (
+    run_classifier_training,
+    run_node_tombstone_pruning,
+    run_prediction_cache_pruning,
+    run_prediction_workers,
+)
+from .routes.core.notifications import listen_node_changes
+from .routes.core.services import apply_node_change
+from .settings import settings
+from .state import db_engine, llm_client
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    tasks = [
+        # Keeps this worker's caches in sync with writes made by other workers.
+        asyncio.create_task(
+            listen_node_changes(
+                db_engine=db_engine,
+                on_change=apply_node_change,
+                reconnect_delay=settings.NODE_CHANGES_RECONNECT_SECONDS,
+            )
+        ),
+        asyncio.create_task(
+            run_prediction_workers(
+                db_engine=db_engine,
+                concurrency=settings.PREDICTION_WORKERS,
+                poll_interval=settings.PREDICTION_POLL_SECONDS,
+                lease=settings.PREDICTION_LEASE_SECONDS,
+                max_attempts=settings.PREDICTION_MAX_ATTEMPTS,
+            )
+        ),
+        asyncio.create_task(
+            run_node_tombstone_pruning(
+                db_engine=db_engine,
+                interval=settings.NODE_TOMBSTONES_PRUNE_SECONDS,
+                retention=timedelta(
+                    days=settings.NODE_TOMBSTONES_RETENTION_DAYS
+                ),
+            )
+        ),
+        asyncio.create_task(
+            run_prediction_cache_pruning(
+                db_engine=db_engine,
+                interval=settings.PREDICTION_CACHE_PRUNE_SECONDS,
+                ttl=timedelta(days=settings.PREDICTION_CACHE_TTL_DAYS),
+            )
+        ),
+        asyncio.create_task(
+            run_classifier_training(
+                db_engine=db_engine,
+                interval=settings.PREDICTION_LOCAL_RETRAIN_SECONDS,
+                min_examples=settings.PREDICTION_LOCAL_MIN_EXAMPLES,
+                max_examples=settings.PREDICTION_LOCAL_MAX_EXAMPLES,
+            )
+        ),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    await llm_client.close()
+    await db_engine.dispose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(router, prefix="/api")
 app.add_middleware(JWTAuthenticationMiddleware)
@@ -19,4 +90,4 @@ app.add_middleware(
 
 
 if __name__ == "__main__":
-    uvicorn.run(app)
+    uvicorn.run("api.main:app", workers=settings.WEB_CONCURRENCY)
@@ -1,17 +1,12 @@
 from copy import copy
 from types import FunctionType
-from typing import Any, Callable
 
 import jwt
 from fastapi import FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import (
-    BaseHTTPMiddleware,
-    RequestResponseEndpoint,
-)
 from starlette.routing import BaseRoute, Match
-from starlette.types import Scope
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .common.authentication import AuthenticatedUser, is_route_authenticated
 from .routes.auth.services import get_user
@@ -38,30 +33,65 @@ def _match_routes(routes: list[BaseRoute], scope: Scope) -> FunctionType | None:
             return _match_routes(endpoint.routes, scope)
 
 
-def _resolve_route(request: Request) -> Callable[..., Any] | None:
+def _authenticated_routes(routes: list[BaseRoute]) -> list[BaseRoute]:
+    """Routes that are, or contain, routes marked `authenticated_route`."""
+
+    found = []
+    for route in routes:
+        endpoint = getattr(route, "endpoint", None)
+        if isinstance(endpoint, FunctionType):
+            if is_route_authenticated(endpoint):
+                found.append(route)
+        elif _authenticated_routes(getattr(route, "routes", [])):
+            found.append(route)
+    return found
+
+
+class JWTAuthenticationMiddleware:
     """
-    Find an endpoint function based on the request based.
-    It's mainly useful in middlewares where endpoint function is not available
-    right away.
+    Authenticates requests to routes marked with `authenticated_route`.
+
+    The few authenticated routes are collected on the first request. Only
+    requests matching one of them go through the full route resolution,
+    which an earlier public route may still win; every other request is
+    public after a handful of path matches.
     """
 
-    app: FastAPI = request.app
-    try:
-        return request.state._route
-    except AttributeError:
-        request.state._route = _match_routes(app.routes, copy(request.scope))
-        return request.state._route
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._authenticated_routes: list[BaseRoute] | None = None
 
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http" or not self._is_authenticated(scope):
+            await self.app(scope, receive, send)
+            return
 
-class JWTAuthenticationMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
-        route = _resolve_route(request)
-        if not route or not is_route_authenticated(route):
-            return await call_next(request)
+        request = Request(scope)
+        response = await self._authenticate(request)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def _is_authenticated(self, scope: Scope) -> bool:
+        app: FastAPI = scope["app"]
+        if self._authenticated_routes is None:
+            self._authenticated_routes = _authenticated_routes(app.routes)
+
+        if not any(
+            route.matches(scope)[0] == Match.FULL
+            for route in self._authenticated_routes
+        ):
+            return False
+
+        route = _match_routes(app.routes, copy(scope))
+        return route is not None and is_route_authenticated(route)
+
+    async def _authenticate(self, request: Request) -> Response | None:
+        """Set the request's user, or return the response rejecting it."""
 
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
@@ -96,5 +126,4 @@ class JWTAuthenticationMiddleware(BaseHTTPMiddleware):
             request=request,
             user=AuthenticatedUser(id=payload["user_id"], role=user.role),
         )
-
-        return await call_next(request)
+        return None
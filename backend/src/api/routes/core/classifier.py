@@ -0,0 +1,136 @@
+import logging
+import random
+from typing import NamedTuple, Protocol
+
+from api.db.tables.core import NodeAccessibility
+
+from .schemas import LocalClassifierStatsSchema
+
+logger = logging.getLogger(__name__)
+
+# Labels the local classifier is trained with.
+LEVELS = [level.value for level in NodeAccessibility]
+# Decisions between two log lines about how the local classifier does.
+LOG_EVERY = 100
+
+
+class Classification(NamedTuple):
+    accessibility: NodeAccessibility
+    # Probability of `accessibility`, between 0 and 1.
+    confidence: float
+
+
+class TextClassifier(Protocol):
+    # Number of examples the classifier was trained on.
+    examples: int
+
+    def classify(self, text: str) -> tuple[str, float]: ...
+
+
+class LocalFirstPass:
+    """
+    Lets a local classifier answer before the LLM is asked.
+
+    Guesses at least `threshold` confident are used as is, except for an
+    `audit_rate` share of them, which are still sent to the LLM to measure
+    how often confident guesses are right. Every guess that reaches the LLM
+    is compared with its answer, so the threshold can be tuned from the
+    logged escalation rate and agreement.
+    """
+
+    def __init__(self, threshold: float, audit_rate: float) -> None:
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        # Swapped for a freshly trained one from time to time, see
+        # `api.common.text_classifier`.
+        self.classifier: TextClassifier | None = None
+        self.answered = 0
+        self.escalated = 0
+        self.audited = 0
+        self.escalated_agreed = 0
+        self.audited_agreed = 0
+
+    def classify(self, text: str) -> Classification | None:
+        """Guess with the local classifier, `None` until there is one."""
+
+        if self.classifier is None:
+            return None
+
+        level, confidence = self.classifier.classify(text)
+        return Classification(
+            accessibility=NodeAccessibility(level),
+            confidence=confidence,
+        )
+
+    def settle(self, guess: Classification | None) -> bool:
+        """Whether `guess` is the answer, or the LLM has to be asked."""
+
+        if (
+            guess is None
+            or guess.confidence < self.threshold
+            or random.random() < self.audit_rate
+        ):
+            return False
+
+        self.answered += 1
+        self._maybe_log()
+        return True
+
+    def compare(
+        self,
+        guess: Classification | None,
+        accessibility: NodeAccessibility,
+    ) -> None:
+        """Record whether `guess` matches what the LLM answered."""
+
+        if guess is None:
+            return
+
+        agreed = guess.accessibility == accessibility
+        if guess.confidence < self.threshold:
+            self.escalated += 1
+            self.escalated_agreed += agreed
+        else:
+            self.audited += 1
+            self.audited_agreed += agreed
+        self._maybe_log()
+
+    def stats(self) -> LocalClassifierStatsSchema:
+        return LocalClassifierStatsSchema(
+            examples=(
+                self.classifier.examples
+                if self.classifier is not None
+                else None
+            ),
+            threshold=self.threshold,
+            answered=self.answered,
+            escalated=self.escalated,
+            audited=self.audited,
+            escalation_rate=_ratio(
+                self.escalated,
+                self.answered + self.audited + self.escalated,
+            ),
+            escalated_agreement=_ratio(self.escalated_agreed, self.escalated),
+            audited_agreement=_ratio(self.audited_agreed, self.audited),
+        )
+
+    def _maybe_log(self) -> None:
+        if (self.answered + self.audited + self.escalated) % LOG_EVERY:
+            return
+
+        stats = self.stats()
+        logger.info(
+            "Local classifier: %d answered, %d audited, %d escalated "
+            "(rate %s), agreement %s below and %s above threshold %s",
+            stats.answered,
+            stats.audited,
+            stats.escalated,
+            stats.escalation_rate,
+            stats.escalated_agreement,
+            stats.audited_agreement,
+            stats.threshold,
+        )
+
+
+def _ratio(part: int, whole: int) -> float | None:
+    return round(part / whole, 3) if whole else None
@@ -0,0 +1,105 @@
+import math
+from collections import OrderedDict
+
+from .schemas import BoundingBox, NodeClusterSchema
+
+# Every tile is split into TILE_CELLS x TILE_CELLS clustering cells.
+TILE_CELLS = 4
+
+Tile = tuple[int, int, int]
+
+
+def tile_size(zoom: int) -> float:
+    """Side of a tile in degrees, halving with every zoom level."""
+    return 360 / 2**zoom
+
+
+def cell_size(zoom: int) -> float:
+    return tile_size(zoom) / TILE_CELLS
+
+
+def tiles_for_bbox(bbox: BoundingBox, zoom: int, limit: int) -> list[Tile]:
+    """Tiles covering `bbox`, failing if there are more than `limit`."""
+    size = tile_size(zoom)
+    xs = range(math.floor(bbox.west / size), math.floor(bbox.east / size) + 1)
+    ys = range(math.floor(bbox.south / size), math.floor(bbox.north / size) + 1)
+    if len(xs) * len(ys) > limit:
+        raise ValueError("Bounding box is too large for the given zoom")
+
+    return [(zoom, x, y) for x in xs for y in ys]
+
+
+def tile_at(lat: float, lon: float, zoom: int) -> Tile:
+    """Tile a point is clustered in, the same way the clusters query does."""
+    size = cell_size(zoom)
+    return (
+        zoom,
+        math.floor(lon / size) // TILE_CELLS,
+        math.floor(lat / size) // TILE_CELLS,
+    )
+
+
+def tiles_bbox(tiles: list[Tile]) -> BoundingBox:
+    """Smallest bounding box covering all given tiles of one zoom level."""
+    size = tile_size(tiles[0][0])
+    xs = [x for _, x, _ in tiles]
+    ys = [y for _, _, y in tiles]
+    return BoundingBox.model_construct(
+        west=min(xs) * size,
+        south=min(ys) * size,
+        east=(max(xs) + 1) * size,
+        north=(max(ys) + 1) * size,
+    )
+
+
+class ClusterCache:
+    """
+    LRU cache of node clusters per map tile.
+
+    Tiles are aligned to a fixed grid for every zoom level, so panning the
+    map reuses tiles computed for earlier viewports. Tiles computed before
+    an eviction or `clear` finished are not stored, see `generation`.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._tiles: OrderedDict[Tile, list[NodeClusterSchema]] = OrderedDict()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        """Changes whenever tiles are dropped, to be read before computing."""
+        return self._generation
+
+    def get(self, tile: Tile) -> list[NodeClusterSchema] | None:
+        clusters = self._tiles.get(tile)
+        if clusters is not None:
+            self._tiles.move_to_end(tile)
+        return clusters
+
+    def set(
+        self,
+        tile: Tile,
+        clusters: list[NodeClusterSchema],
+        generation: int,
+    ) -> None:
+        """Store `clusters` unless tiles were dropped since `generation`."""
+
+        if generation != self._generation:
+            return
+
+        self._tiles[tile] = clusters
+        self._tiles.move_to_end(tile)
+        while len(self._tiles) > self.maxsize:
+            self._tiles.popitem(last=False)
+
+    def evict_point(self, lat: float, lon: float) -> None:
+        """Drop the tiles of every zoom level that contain the point."""
+        self._generation += 1
+        zooms = {zoom for zoom, _, _ in self._tiles}
+        for zoom in zooms:
+            self._tiles.pop(tile_at(lat=lat, lon=lon, zoom=zoom), None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._tiles.clear()
@@ -0,0 +1,126 @@
+from enum import StrEnum
+from typing import Any
+
+import msgpack
+from starlette.requests import Request
+
+from api.db.tables.core import NodeAccessibility
+
+from .schemas import NodeSchema, UserSchema
+
+# Accessibility levels as sent in the columnar layout, by their position.
+ACCESSIBILITY_CODES = list(NodeAccessibility)
+
+
+class NodeEncoding(StrEnum):
+    JSON = "application/json"
+    # Same structure as JSON, but with binary encoding.
+    MSGPACK = "application/msgpack"
+    # Nodes are sent as parallel arrays, see `to_columns`.
+    COLUMNAR = "application/vnd.barrier-free.columnar+msgpack"
+
+
+def negotiate_encoding(request: Request) -> NodeEncoding:
+    """Pick the first encoding listed in the Accept header, JSON by default."""
+
+    accept = request.headers.get("Accept", "")
+    for media_range in accept.split(","):
+        media_type = media_range.split(";")[0].strip()
+        try:
+            return NodeEncoding(media_type)
+        except ValueError:
+            continue
+
+    return NodeEncoding.JSON
+
+
+def pack(value: Any) -> bytes:
+    return msgpack.Packer(datetime=True).pack(value)
+
+
+def to_columns(nodes: list[NodeSchema]) -> dict[str, Any]:
+    """
+    Lay out nodes as parallel arrays.
+
+    Node `i` owns comments `comment_offsets[i]` up to (excluding)
+    `comment_offsets[i + 1]`, and likewise for propositions. Accessibility is
+    sent as an index into `accessibility_codes`, and users are listed once
+    and referenced by `user_id`.
+    """
+
+    codes = {
+        accessibility: i for i, accessibility in enumerate(ACCESSIBILITY_CODES)
+    }
+    users: dict[int, UserSchema] = {}
+
+    columns: dict[str, Any] = {
+        "accessibility_codes": [a.value for a in ACCESSIBILITY_CODES],
+        "osm_id": [],
+        "accessibility": [],
+        "lat": [],
+        "lon": [],
+        "comments_count": [],
+        "comment_offsets": [0],
+        "comments": {"id": [], "user_id": [], "text": [], "created_at": []},
+        "accessibility_propositions_count": [],
+        "proposition_offsets": [0],
+        "accessibility_propositions": {
+            "id": [],
+            "user_id": [],
+            "accessibility": [],
+            "text": [],
+            "created_at": [],
+        },
+    }
+    comments = columns["comments"]
+    propositions = columns["accessibility_propositions"]
+    for node in nodes:
+        columns["osm_id"].append(node.osm_id)
+        columns["accessibility"].append(
+            codes[node.accessibility]
+            if node.accessibility is not None
+            else None
+        )
+        columns["lat"].append(node.lat)
+        columns["lon"].append(node.lon)
+        columns["comments_count"].append(node.comments_count)
+        columns["accessibility_propositions_count"].append(
+            node.accessibility_propositions_count
+        )
+
+        for comment in node.comments:
+            users[comment.user.id] = comment.user
+            comments["id"].append(comment.id)
+            comments["user_id"].append(comment.user.id)
+            comments["text"].append(comment.text)
+            comments["created_at"].append(comment.created_at)
+        columns["comment_offsets"].append(len(comments["id"]))
+
+        for proposition in node.accessibility_propositions:
+            users[proposition.user.id] = proposition.user
+            propositions["id"].append(proposition.id)
+            propositions["user_id"].append(proposition.user.id)
+            propositions["accessibility"].append(
+                codes[proposition.accessibility]
+            )
+            propositions["text"].append(proposition.text)
+            propositions["created_at"].append(proposition.created_at)
+        columns["proposition_offsets"].append(len(propositions["id"]))
+
+    columns["users"] = {
+        "id": list(users),
+        "email": [user.email for user in users.values()],
+        "disabilities": [
+            [disability.value for disability in user.disabilities]
+            for user in users.values()
+        ],
+    }
+    return columns
+
+
+def nodes_payload(nodes: list[NodeSchema], encoding: NodeEncoding) -> Any:
+    """Nodes ready to be packed for a binary `encoding`."""
+
+    if encoding == NodeEncoding.COLUMNAR:
+        return to_columns(nodes)
+    return [node.model_dump() for node in nodes]
@@ -0,0 +1,77 @@
+import asyncio
+from typing import AsyncIterator
+
+from api.settings import settings
+
+from .schemas import BoundingBox, NodeEventSchema
+
+
+class NodeEventSubscription:
+    def __init__(self, bbox: BoundingBox | None, queue_size: int) -> None:
+        self.bbox = bbox
+        self.queue: asyncio.Queue[NodeEventSchema] = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def wants(self, event: NodeEventSchema) -> bool:
+        if self.bbox is None or event.lat is None or event.lon is None:
+            return True
+
+        return self.bbox.contains(lat=event.lat, lon=event.lon)
+
+
+class NodeEventBroadcaster:
+    """
+    In-process fan-out of node change events.
+
+    Publishing never blocks: every subscriber has a bounded queue, and a
+    subscriber that falls behind is dropped so it can reconnect and resync,
+    instead of slowing down everyone else. Idle subscribers cost a pending
+    queue read and nothing more.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscriptions: set[NodeEventSubscription] = set()
+
+    def publish(self, event: NodeEventSchema) -> None:
+        for subscription in list(self._subscriptions):
+            if not subscription.wants(event):
+                continue
+
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                self._subscriptions.discard(subscription)
+
+    async def subscribe(
+        self,
+        bbox: BoundingBox | None,
+        keepalive: float,
+    ) -> AsyncIterator[NodeEventSchema | None]:
+        """
+        Yield events matching `bbox` until the subscriber falls behind.
+
+        `None` is yielded after `keepalive` seconds without events, so the
+        caller can keep the connection open through proxies.
+        """
+
+        subscription = NodeEventSubscription(
+            bbox=bbox,
+            queue_size=self.queue_size,
+        )
+        self._subscriptions.add(subscription)
+        try:
+            while not subscription.overflowed or not subscription.queue.empty():
+                try:
+                    yield await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=keepalive,
+                    )
+                except TimeoutError:
+                    yield None
+        finally:
+            self._subscriptions.discard(subscription)
+
+
+node_events = NodeEventBroadcaster(queue_size=settings.NODE_EVENTS_QUEUE_SIZE)
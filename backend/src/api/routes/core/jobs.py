@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ...common.llm import LLMUnavailableError
+from ...common.text_classifier import LinearClassifier
+from . import services
+from .classifier import LEVELS
+
+logger = logging.getLogger(__name__)
+
+
+async def run_prediction_workers(
+    db_engine: AsyncEngine,
+    concurrency: int,
+    poll_interval: float,
+    lease: float,
+    max_attempts: int,
+) -> None:
+    """
+    Run `concurrency` workers taking prediction jobs until cancelled.
+
+    Workers of every process share the same queue, so any number of
+    processes can run them.
+    """
+
+    async with asyncio.TaskGroup() as task_group:
+        for _ in range(concurrency):
+            task_group.create_task(
+                _run_prediction_worker(
+                    db_engine=db_engine,
+                    poll_interval=poll_interval,
+                    lease=lease,
+                    max_attempts=max_attempts,
+                )
+            )
+
+
+async def _run_prediction_worker(
+    db_engine: AsyncEngine,
+    poll_interval: float,
+    lease: float,
+    max_attempts: int,
+) -> None:
+    while True:
+        try:
+            async with db_engine.connect() as db_conn:
+                job = await services.claim_prediction_job(
+                    db_conn=db_conn,
+                    lease=lease,
+                )
+            # Jobs take connections only while they read or write, so none
+            # is held while the model is asked.
+            if job is not None:
+                try:
+                    await services.run_prediction_job(
+                        db_engine=db_engine,
+                        job=job,
+                    )
+                except LLMUnavailableError as e:
+                    logger.warning(
+                        "Prediction of %s postponed: %s", job.osm_id, e
+                    )
+                    async with db_engine.connect() as db_conn:
+                        await services.postpone_prediction_job(
+                            db_conn=db_conn,
+                            job=job,
+                        )
+                except Exception:
+                    logger.exception("Prediction of %s failed", job.osm_id)
+                    async with db_engine.connect() as db_conn:
+                        await services.fail_prediction_job(
+                            db_conn=db_conn,
+                            job=job,
+                            max_attempts=max_attempts,
+                        )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Prediction worker failed")
+            job = None
+
+        # Keep going while there is work, only wait when the queue is empty.
+        if job is None:
+            await asyncio.sleep(poll_interval)
+
+
+async def run_prediction_cache_pruning(
+    db_engine: AsyncEngine,
+    interval: float,
+    ttl: timedelta,
+) -> None:
+    """Delete stored predictions older than `ttl` every `interval` seconds."""
+
+    while True:
+        try:
+            deleted = await services.prediction_cache.prune(
+                db_engine=db_engine,
+                max_age=ttl,
+            )
+            if deleted:
+                logger.info("Pruned %d cached predictions", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Pruning the prediction cache failed")
+
+        await asyncio.sleep(interval)
+
+
+async def run_node_tombstone_pruning(
+    db_engine: AsyncEngine,
+    interval: float,
+    retention: timedelta,
+) -> None:
+    """Delete tombstones older than `retention` every `interval` seconds."""
+
+    while True:
+        try:
+            async with db_engine.connect() as db_conn:
+                deleted = await services.prune_node_tombstones(
+                    db_conn=db_conn,
+                    max_age=retention,
+                )
+            if deleted:
+                logger.info("Pruned %d node tombstones", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Pruning node tombstones failed")
+
+        await asyncio.sleep(interval)
+
+
+async def run_classifier_training(
+    db_engine: AsyncEngine,
+    interval: float,
+    min_examples: int,
+    max_examples: int,
+) -> None:
+    """
+    Train the local accessibility classifier every `interval` seconds, on
+    the latest `max_examples` labelled descriptions.
+
+    Until `min_examples` labelled descriptions exist, no classifier is used
+    and every prediction goes to the LLM.
+    """
+
+    # Training is CPU bound and would hold the GIL even in a thread, so it
+    # runs in a process of its own and requests keep being served. That
+    # process only imports `api.common.text_classifier`.
+    executor = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    try:
+        while True:
+            try:
+                async with db_engine.connect() as db_conn:
+                    examples = await services.load_training_examples(
+                        db_conn=db_conn,
+                        limit=max_examples,
+                    )
+
+                if len(examples) >= min_examples:
+                    # Plain strings, so unpickling them in the training
+                    # process imports nothing from the app.
+                    fit = partial(
+                        LinearClassifier.fit,
+                        [(text, level.value) for text, level in examples],
+                        LEVELS,
+                    )
+                    loop = asyncio.get_running_loop()
+                    classifier = await loop.run_in_executor(executor, fit)
+                    services.local_first_pass.classifier = classifier
+                    logger.info(
+                        "Trained the local classifier on %d examples",
+                        len(examples),
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Training the local classifier failed")
+
+            await asyncio.sleep(interval)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import uuid
+from typing import Callable
+
+import psycopg
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, sql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .schemas import NodeEventSchema
+
+logger = logging.getLogger(__name__)
+
+NODE_CHANGES_CHANNEL = "node_changes"
+
+# Identifies this process, so it can skip notifications it sent itself.
+WORKER_ID = uuid.uuid4().hex
+
+
+class NodeChangeNotification(BaseModel):
+    origin: str
+    # `None` means any node may have changed.
+    event: NodeEventSchema | None = None
+
+
+async def notify_node_changed(
+    db_conn: AsyncConnection,
+    event: NodeEventSchema | None,
+) -> None:
+    """
+    Tell every worker about a node change.
+
+    Postgres delivers the notification only once the current transaction
+    commits, and drops it if it is rolled back.
+    """
+
+    payload = NodeChangeNotification(origin=WORKER_ID, event=event)
+    await db_conn.execute(
+        sql.select(
+            func.pg_notify(NODE_CHANGES_CHANNEL, payload.model_dump_json())
+        )
+    )
+
+
+async def listen_node_changes(
+    db_engine: AsyncEngine,
+    on_change: Callable[[NodeEventSchema | None], None],
+    reconnect_delay: float,
+) -> None:
+    """
+    Call `on_change` for node changes committed by other workers.
+
+    Runs until cancelled, holding a dedicated connection. Notifications sent
+    while the connection is down are lost, so `on_change(None)` is called
+    whenever listening (re)starts or stops.
+    """
+
+    while True:
+        try:
+            async with db_engine.connect() as conn:
+                raw_conn = await conn.get_raw_connection()
+                driver_conn = raw_conn.driver_connection
+                assert isinstance(driver_conn, psycopg.AsyncConnection)
+                try:
+                    await driver_conn.set_autocommit(True)
+                    await driver_conn.execute(f"LISTEN {NODE_CHANGES_CHANNEL}")
+                    on_change(None)
+                    async for notify in driver_conn.notifies():
+                        _dispatch(notify.payload, on_change)
+                finally:
+                    # Never hand a listening connection back to the pool.
+                    await conn.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Listening for node changes failed")
+
+        on_change(None)
+        await asyncio.sleep(reconnect_delay)
+
+
+def _dispatch(
+    payload: str,
+    on_change: Callable[[NodeEventSchema | None], None],
+) -> None:
+    try:
+        notification = NodeChangeNotification.model_validate_json(payload)
+    except ValidationError:
+        logger.warning("Ignoring malformed node change: %r", payload)
+        return
+
+    if notification.origin != WORKER_ID:
+        on_change(notification.event)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import func, sql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from api.db.tables.core import NodeAccessibility, PredictionCacheEntry
+
+from .schemas import PredictionCacheStatsSchema
+
+# Comments sharing at least this share of their words are near duplicates.
+NEAR_DUPLICATE_SIMILARITY = 0.8
+# A comment is only truncated to fit if at least this many tokens are left.
+MIN_TRUNCATED_TOKENS = 16
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace, which does not change what the model sees."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate token count of `text`, about 4 characters per token for
+    the OpenAI tokenizers.
+    """
+    return (len(text) + 3) // 4
+
+
+@dataclass(frozen=True)
+class BudgetedComments:
+    # Oldest first.
+    comments: list[str]
+    tokens: int
+    # Tokens the given comments would have taken on top of `tokens`.
+    tokens_saved: int
+
+
+def fit_comments(comments: list[str], budget: int) -> BudgetedComments:
+    """
+    Pick the comments to send, newest first, within `budget` tokens.
+
+    `comments` must be sorted newest first. Exact and near duplicates of a
+    newer comment are dropped, and the first comment that does not fit is
+    cut at a word boundary, if enough of the budget is left for it to say
+    something. The result only depends on the arguments.
+    """
+
+    kept: list[str] = []
+    kept_words: list[set[str]] = []
+    tokens = 0
+    for comment in comments:
+        comment = normalize_text(comment)
+        words = set(_WORD_RE.findall(comment.lower()))
+        if any(
+            _similarity(words, other) >= NEAR_DUPLICATE_SIMILARITY
+            for other in kept_words
+        ):
+            continue
+
+        left = budget - tokens
+        if estimate_tokens(comment) > left:
+            if left >= MIN_TRUNCATED_TOKENS:
+                comment = _truncate(comment, tokens=left)
+                kept.append(comment)
+                tokens += estimate_tokens(comment)
+            break
+
+        kept.append(comment)
+        kept_words.append(words)
+        tokens += estimate_tokens(comment)
+
+    total = sum(
+        estimate_tokens(normalize_text(comment)) for comment in comments
+    )
+    return BudgetedComments(
+        comments=kept[::-1],
+        tokens=tokens,
+        tokens_saved=total - tokens,
+    )
+
+
+def _similarity(a: set[str], b: set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _truncate(text: str, tokens: int) -> str:
+    # Room for the ellipsis.
+    cut = text[: tokens * 4 - 4]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + " ..."
+
+
+def prediction_key(text: str, model: str, prompt: str) -> str:
+    """
+    Identify a prediction by everything that determines it.
+
+    Any change to the model or the prompt template yields new keys, so
+    predictions made with the old ones are never reused.
+    """
+
+    digest = hashlib.blake2b(digest_size=32)
+    for part in (model, prompt, text):
+        data = part.encode()
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def parse_accessibility(answer: str) -> NodeAccessibility:
+    """Read a single level out of a model answer, or raise `ValueError`."""
+    return NodeAccessibility(answer.strip().strip('"').lower())
+
+
+def parse_batch_answer(
+    answer: str, count: int
+) -> list[NodeAccessibility | None]:
+    """
+    Read the levels of items `1` to `count` out of a JSON object answer.
+
+    Items that are missing or unreadable are `None`, and so is every item
+    if the answer is not a JSON object at all.
+    """
+
+    answer = answer.strip().removeprefix("```json").strip("`")
+    try:
+        levels = json.loads(answer)
+    except ValueError:
+        levels = None
+    if not isinstance(levels, dict):
+        return [None] * count
+
+    results: list[NodeAccessibility | None] = []
+    for i in range(1, count + 1):
+        level = levels.get(str(i))
+        if not isinstance(level, str):
+            results.append(None)
+            continue
+
+        try:
+            results.append(parse_accessibility(level))
+        except ValueError:
+            results.append(None)
+    return results
+
+
+class PredictionCache:
+    """
+    Two-tier cache of accessibility predictions.
+
+    Lookups go to an in-process LRU first, then to the `prediction_cache`
+    table, which is shared by all processes and survives restarts. The table
+    is read and written on short-lived connections of its own, so none is
+    held while the model is asked.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, NodeAccessibility] = OrderedDict()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get(
+        self,
+        db_engine: AsyncEngine,
+        key: str,
+    ) -> NodeAccessibility | None:
+        accessibility = self._entries.get(key)
+        if accessibility is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return accessibility
+
+        query = sql.select(PredictionCacheEntry.accessibility).where(
+            PredictionCacheEntry.key == key
+        )
+        async with db_engine.connect() as db_conn:
+            cursor_result = await db_conn.execute(query)
+            accessibility = cursor_result.scalar_one_or_none()
+        if accessibility is None:
+            self.misses += 1
+            return None
+
+        self.db_hits += 1
+        self._remember(key, accessibility)
+        return accessibility
+
+    async def set(
+        self,
+        db_engine: AsyncEngine,
+        key: str,
+        accessibility: NodeAccessibility,
+    ) -> None:
+        query = (
+            insert(PredictionCacheEntry)
+            .values(key=key, accessibility=accessibility)
+            .on_conflict_do_nothing()
+        )
+        async with db_engine.connect() as db_conn:
+            await db_conn.execute(query)
+            await db_conn.commit()
+        self._remember(key, accessibility)
+
+    async def prune(self, db_engine: AsyncEngine, max_age: timedelta) -> int:
+        """
+        Delete the stored predictions older than `max_age`, returning how
+        many there were.
+
+        The in-process LRU is bounded on its own and is left as it is.
+        """
+
+        query = sql.delete(PredictionCacheEntry).where(
+            PredictionCacheEntry.created_at < func.now() - max_age
+        )
+        async with db_engine.connect() as db_conn:
+            cursor_result = await db_conn.execute(query)
+            await db_conn.commit()
+        return cursor_result.rowcount
+
+    def stats(self) -> PredictionCacheStatsSchema:
+        return PredictionCacheStatsSchema(
+            size=len(self._entries),
+            memory_hits=self.memory_hits,
+            db_hits=self.db_hits,
+            misses=self.misses,
+        )
+
+    def _remember(self, key: str, accessibility: NodeAccessibility) -> None:
+        self._entries[key] = accessibility
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -1,25 +1,41 @@
 from typing import Annotated
 
-from fastapi import Path
-from fastapi.responses import JSONResponse
+from fastapi import Path, Query, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.routing import APIRouter
-from pydantic import TypeAdapter
 from starlette import status
 
 from api.db.tables import UserDisability
 from api.routes.auth.routes import authenticated_route
-from api.state import CurrentUser, DbConn
+from api.state import CurrentUser, DbConn, db_engine
 
+from ...common.cache import cached_response
+from ...common.llm import LLMUnavailableError
+from ...db.tables.core import NodeAccessibility
 from ...db.tables.users import UserRole
+from ...settings import settings
 from . import services
+from .encoding import NodeEncoding, negotiate_encoding, nodes_payload, pack
+from .events import node_events
 from .schemas import (
+    BatchGetNodesBody,
+    BatchGetNodesResponse,
+    BoundingBox,
     CreateNodeAccessibilityPropositionBody,
     CreateNodeCommentBody,
-    NodeSchema,
+    ItemCursor,
+    NodeClusterListAdapter,
+    NodeListAdapter,
+    NodeShape,
     PredictAccessibilityBody,
     UpdateNodeBody,
 )
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+MAX_ITEMS_PAGE_SIZE = 100
+
 router = APIRouter()
 
 
@@ -40,6 +56,8 @@ async def create_comments(
         osm_id=body.osm_id,
         user_id=user.id,
         text=body.text,
+        lat=body.lat,
+        lon=body.lon,
     )
     return JSONResponse(
         content={"id": comment_id},
@@ -62,14 +80,284 @@ async def delete_comment(
 
 
 @router.get("/nodes")
-async def list_nodes(db_conn: DbConn):
-    nodes = await services.list_nodes(db_conn=db_conn)
-    return JSONResponse(
-        content=TypeAdapter(list[NodeSchema]).dump_python(nodes, mode="json")
+async def list_nodes(
+    request: Request,
+    bbox: Annotated[str | None, Query()] = None,
+    after: Annotated[str | None, Query()] = None,
+    limit: Annotated[int | None, Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    since: Annotated[int | None, Query(ge=0)] = None,
+    shape: Annotated[NodeShape, Query()] = NodeShape.EMBEDDED,
+):
+    if since is not None and (
+        bbox is not None or after is not None or limit is not None
+    ):
+        return JSONResponse(
+            content={"error": "since cannot be combined with other filters"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        bounding_box = BoundingBox.from_string(bbox) if bbox else None
+    except ValueError:
+        return JSONResponse(
+            content={"error": "bbox must be 'west,south,east,north'"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if after is not None and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+
+    streaming = NDJSON_MEDIA_TYPE in request.headers.get("Accept", "")
+    encoding = negotiate_encoding(request)
+    if shape == NodeShape.NORMALIZED and (
+        since is not None or streaming or encoding != NodeEncoding.JSON
+    ):
+        return JSONResponse(
+            content={"error": "shape=normalized is only supported for lists"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if streaming:
+        nodes = services.stream_nodes(
+            db_engine=db_engine,
+            bbox=bounding_box,
+            after=after,
+            limit=limit,
+        )
+        return StreamingResponse(
+            (node.model_dump_json() + "\n" async for node in nodes),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    async def render() -> bytes:
+        # Shared by every caller waiting for the same key, so it cannot use
+        # the connection of the request that happened to start it.
+        async with db_engine.connect() as db_conn:
+            if since is not None:
+                changes = await services.list_node_changes(
+                    db_conn=db_conn,
+                    since=since,
+                )
+                if encoding == NodeEncoding.JSON:
+                    return changes.model_dump_json().encode()
+
+                return pack(
+                    {
+                        "nodes": nodes_payload(changes.nodes, encoding),
+                        "deleted": changes.deleted,
+                        "token": changes.token,
+                    }
+                )
+
+            if encoding != NodeEncoding.JSON:
+                nodes = await services.list_nodes(
+                    db_conn=db_conn,
+                    bbox=bounding_box,
+                    after=after,
+                    limit=limit,
+                )
+                if limit is None:
+                    return pack(nodes_payload(nodes, encoding))
+
+                return pack(
+                    {
+                        "nodes": nodes_payload(nodes, encoding),
+                        "next_after": (
+                            nodes[-1].osm_id if len(nodes) == limit else None
+                        ),
+                    }
+                )
+
+            return await services.list_nodes_json(
+                db_conn=db_conn,
+                bbox=bounding_box,
+                after=after,
+                limit=limit,
+                normalized=shape == NodeShape.NORMALIZED,
+            )
+
+    try:
+        cached = await services.nodes_cache.get_or_compute(
+            key=(bbox, after, limit, since, shape, encoding),
+            compute=render,
+        )
+    except services.SyncTokenExpiredError:
+        return JSONResponse(
+            content={"error": "since is too old, sync again from since=0"},
+            status_code=status.HTTP_410_GONE,
+        )
+    return cached_response(
+        request=request,
+        cached=cached,
+        media_type=encoding.value,
+    )
+
+
+@router.post("/nodes:batchGet")
+async def batch_get_nodes(
+    request: Request,
+    db_conn: DbConn,
+    body: BatchGetNodesBody,
+):
+    nodes = await services.get_nodes(db_conn=db_conn, osm_ids=body.osm_ids)
+    response = BatchGetNodesResponse(
+        nodes=nodes,
+        missing=[
+            osm_id for osm_id, node in zip(body.osm_ids, nodes) if node is None
+        ],
+    )
+
+    encoding = negotiate_encoding(request)
+    if encoding == NodeEncoding.JSON:
+        return ORJSONResponse(content=response.model_dump())
+    if encoding == NodeEncoding.MSGPACK:
+        return Response(
+            content=pack(response.model_dump()),
+            media_type=encoding.value,
+        )
+
+    # The columnar layout has no room for missing nodes, so only the found
+    # ones are sent.
+    found = [node for node in nodes if node is not None]
+    return Response(
+        content=pack(
+            {
+                "nodes": nodes_payload(found, encoding),
+                "missing": response.missing,
+            }
+        ),
+        media_type=encoding.value,
+    )
+
+
+@router.get("/nodes/nearest")
+async def list_nearest_nodes(
+    db_conn: DbConn,
+    lat: Annotated[float, Query(ge=-90, le=90)],
+    lon: Annotated[float, Query(ge=-180, le=180)],
+    k: Annotated[int, Query(ge=1, le=100)] = 10,
+    accessibility: Annotated[NodeAccessibility | None, Query()] = None,
+    disabilities: Annotated[list[UserDisability] | None, Query()] = None,
+):
+    nodes = await services.list_nearest_nodes(
+        db_conn=db_conn,
+        lat=lat,
+        lon=lon,
+        k=k,
+        accessibility=accessibility,
+        disabilities=disabilities,
+    )
+    return ORJSONResponse(content=NodeListAdapter.dump_python(nodes))
+
+
+@router.get("/nodes/clusters")
+async def list_node_clusters(
+    db_conn: DbConn,
+    bbox: Annotated[str, Query()],
+    zoom: Annotated[int, Query(ge=0, le=20)],
+):
+    try:
+        clusters = await services.list_node_clusters(
+            db_conn=db_conn,
+            bbox=BoundingBox.from_string(bbox),
+            zoom=zoom,
+        )
+    except ValueError as e:
+        return JSONResponse(
+            content={"error": str(e)},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return ORJSONResponse(content=NodeClusterListAdapter.dump_python(clusters))
+
+
+@router.get("/nodes/events")
+async def stream_node_events(bbox: Annotated[str | None, Query()] = None):
+    try:
+        bounding_box = BoundingBox.from_string(bbox) if bbox else None
+    except ValueError:
+        return JSONResponse(
+            content={"error": "bbox must be 'west,south,east,north'"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    events = node_events.subscribe(
+        bbox=bounding_box,
+        keepalive=settings.NODE_EVENTS_KEEPALIVE_SECONDS,
+    )
+    return StreamingResponse(
+        (
+            f"event: node\ndata: {event.model_dump_json()}\n\n"
+            if event is not None
+            else ": keepalive\n\n"
+            async for event in events
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.get("/nodes/{osm_id:path}/comments")
+async def list_node_comments(
+    db_conn: DbConn,
+    osm_id: Annotated[str, Path()],
+    before: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_ITEMS_PAGE_SIZE)] = 20,
+):
+    try:
+        cursor = ItemCursor.from_string(before) if before else None
+    except ValueError:
+        return JSONResponse(
+            content={"error": "before must be 'created_at,id'"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    page = await services.list_node_comments(
+        db_conn=db_conn,
+        osm_id=osm_id,
+        limit=limit,
+        before=cursor,
+    )
+    return ORJSONResponse(content=page.model_dump())
+
+
+@router.get("/nodes/{osm_id:path}/accessibility_propositions")
+async def list_node_accessibility_propositions(
+    db_conn: DbConn,
+    osm_id: Annotated[str, Path()],
+    before: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_ITEMS_PAGE_SIZE)] = 20,
+):
+    try:
+        cursor = ItemCursor.from_string(before) if before else None
+    except ValueError:
+        return JSONResponse(
+            content={"error": "before must be 'created_at,id'"},
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    page = await services.list_node_accessibility_propositions(
+        db_conn=db_conn,
+        osm_id=osm_id,
+        limit=limit,
+        before=cursor,
     )
+    return ORJSONResponse(content=page.model_dump())
+
 
+@router.get("/nodes/{osm_id:path}")
+async def get_node(db_conn: DbConn, osm_id: Annotated[str, Path()]):
+    node = await services.get_node(db_conn=db_conn, osm_id=osm_id)
+    if node is None:
+        return JSONResponse(
+            content={"error": "Node not found"},
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
 
-@router.patch("/nodes/{osm_id}", status_code=status.HTTP_204_NO_CONTENT)
+    return ORJSONResponse(content=node.model_dump())
+
+
+@router.patch("/nodes/{osm_id:path}", status_code=status.HTTP_204_NO_CONTENT)
 @authenticated_route
 async def update_node(
     db_conn: DbConn,
@@ -87,6 +375,8 @@ async def update_node(
         db_conn=db_conn,
         osm_id=osm_id,
         accessibility=body.accessibility,
+        lat=body.lat,
+        lon=body.lon,
     )
 
 
@@ -103,6 +393,8 @@ async def create_accessibility_proposition(
         user_id=user.id,
         text=body.text,
         accessibility=body.accessibility,
+        lat=body.lat,
+        lon=body.lon,
     )
     return JSONResponse(
         content={"id": proposition_id},
@@ -129,4 +421,41 @@ async def delete_accessibility_proposition(
 
 @router.post("/predict_accessibility")
 async def predict_accessibility(body: PredictAccessibilityBody):
-    return await services.predict_accessibility(text=body.text)
+    try:
+        return await services.predict_accessibility(
+            db_engine=db_engine,
+            text=body.text,
+        )
+    except LLMUnavailableError:
+        return JSONResponse(
+            content={"error": "Accessibility prediction is unavailable"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+@router.get("/predict_accessibility/cache")
+@authenticated_route
+async def get_prediction_cache_stats(user: CurrentUser):
+    if user.role != UserRole.ADMIN:
+        return JSONResponse(
+            content={"error": "Only admins are allowed to see cache stats"},
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+    stats = services.prediction_cache.stats()
+    return JSONResponse(content=stats.model_dump())
+
+
+@router.get("/predict_accessibility/classifier")
+@authenticated_route
+async def get_local_classifier_stats(user: CurrentUser):
+    if user.role != UserRole.ADMIN:
+        return JSONResponse(
+            content={
+                "error": "Only admins are allowed to see classifier stats"
+            },
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+
+    stats = services.local_first_pass.stats()
+    return JSONResponse(content=stats.model_dump())
@@ -1,18 +1,44 @@
 from datetime import datetime
+from enum import StrEnum
+from typing import Annotated
 
-from pydantic import BaseModel
+from annotated_types import Ge, Le, MaxLen
+from pydantic import BaseModel, TypeAdapter
 
 from api.db.tables.core import NodeAccessibility
 from api.db.tables.users import UserDisability
 
+Latitude = Annotated[float, Ge(-90), Le(90)]
+Longitude = Annotated[float, Ge(-180), Le(180)]
+
+
+class BoundingBox(BaseModel):
+    west: Longitude
+    south: Latitude
+    east: Longitude
+    north: Latitude
+
+    @classmethod
+    def from_string(cls, value: str) -> "BoundingBox":
+        """Parse `west,south,east,north`, the format Leaflet and Wheelmap use."""
+        west, south, east, north = (float(x) for x in value.split(","))
+        return cls(west=west, south=south, east=east, north=north)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return self.south <= lat <= self.north and self.west <= lon <= self.east
+
 
 class CreateNodeCommentBody(BaseModel):
     osm_id: str
     text: str
+    lat: Latitude | None = None
+    lon: Longitude | None = None
 
 
 class UpdateNodeBody(BaseModel):
     accessibility: NodeAccessibility
+    lat: Latitude | None = None
+    lon: Longitude | None = None
 
 
 class UserSchema(BaseModel):
@@ -39,14 +65,140 @@ class NodeAccessibilityPropositionSchema(BaseModel):
 class NodeSchema(BaseModel):
     osm_id: str
     accessibility: NodeAccessibility | None
+    lat: float | None
+    lon: float | None
+    # Only the latest comments and propositions are embedded, the counts
+    # tell whether there are more to fetch from the node's sub-resources.
     comments: list[NodeCommentSchema]
+    comments_count: int
     accessibility_propositions: list[NodeAccessibilityPropositionSchema]
+    accessibility_propositions_count: int
+
+
+NodeListAdapter = TypeAdapter(list[NodeSchema])
+
+
+class NodeShape(StrEnum):
+    # Every comment and proposition embeds its author.
+    EMBEDDED = "embedded"
+    # Authors are referenced by `user_id` and side-loaded in a `users` map.
+    NORMALIZED = "normalized"
+
+
+class ItemCursor(BaseModel):
+    """Position of a comment or proposition in a node's latest-first list."""
+
+    created_at: datetime
+    id: int
+
+    @classmethod
+    def from_string(cls, value: str) -> "ItemCursor":
+        """Parse `created_at,id`, as produced by `to_string`."""
+        created_at, id = value.rsplit(",", 1)
+        return cls(created_at=datetime.fromisoformat(created_at), id=int(id))
+
+    def to_string(self) -> str:
+        return f"{self.created_at.isoformat()},{self.id}"
+
+
+class NodeCommentPageSchema(BaseModel):
+    comments: list[NodeCommentSchema]
+    next_before: str | None
+
+
+class NodeAccessibilityPropositionPageSchema(BaseModel):
+    accessibility_propositions: list[NodeAccessibilityPropositionSchema]
+    next_before: str | None
+
+
+class NodePageSchema(BaseModel):
+    nodes: list[NodeSchema]
+    next_after: str | None
+
+
+class NodeChangesSchema(BaseModel):
+    nodes: list[NodeSchema]
+    deleted: list[str]
+    token: int
+
+
+class BatchGetNodesBody(BaseModel):
+    osm_ids: Annotated[list[str], MaxLen(10000)]
+
+
+class BatchGetNodesResponse(BaseModel):
+    nodes: list[NodeSchema | None]
+    missing: list[str]
+
+
+class NodeClusterSchema(BaseModel):
+    lat: float
+    lon: float
+    count: int
+    accessibility: dict[NodeAccessibility, int]
+
+
+NodeClusterListAdapter = TypeAdapter(list[NodeClusterSchema])
+
+
+class NodeEventSchema(BaseModel):
+    osm_id: str
+    accessibility: NodeAccessibility | None = None
+    lat: float | None = None
+    lon: float | None = None
+
+
+class PredictionJobSchema(BaseModel):
+    osm_id: str
+    lat: float | None
+    lon: float | None
+    attempts: int
+    requested_at: datetime
+
+
+class NodePredictionSchema(BaseModel):
+    osm_id: str
+    accessibility: NodeAccessibility
+    comment_watermark: int
+    # Revision of the prediction state the prediction started from.
+    revision: int
+    lat: float | None
+    lon: float | None
+
+
+class PredictionRunSchema(BaseModel):
+    name: str
+    last_osm_id: str | None
+    predicted: int
+
+
+class PredictionCacheStatsSchema(BaseModel):
+    size: int
+    memory_hits: int
+    db_hits: int
+    misses: int
+
+
+class LocalClassifierStatsSchema(BaseModel):
+    # `None` until a classifier was trained.
+    examples: int | None
+    threshold: float
+    answered: int
+    escalated: int
+    audited: int
+    escalation_rate: float | None
+    # Share of guesses below the threshold the LLM agreed with.
+    escalated_agreement: float | None
+    # Share of guesses above the threshold the LLM agreed with.
+    audited_agreement: float | None
 
 
 class CreateNodeAccessibilityPropositionBody(BaseModel):
     osm_id: str
     text: str
     accessibility: NodeAccessibility
+    lat: Latitude | None = None
+    lon: Longitude | None = None
 
 
 class PredictAccessibilityBody(BaseModel):
@@ -1,20 +1,103 @@
-from openai import AsyncClient
-from pydantic import TypeAdapter
-from sqlalchemy import JSON, func, sql
-from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
-from sqlalchemy.ext.asyncio import AsyncConnection
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from typing import Any, AsyncIterator, Callable
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    ColumnElement,
+    Function,
+    Integer,
+    String,
+    Text,
+    func,
+    sql,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 
 from api.db.tables.core import (
+    CURRENT_XACT_ID,
     Node,
     NodeAccessibility,
     NodeAccessibilityProposition,
     NodeComment,
+    NodePredictionState,
+    NodeSummary,
+    NodeSyncHorizon,
+    NodeTombstone,
+    PredictionJob,
+    PredictionRun,
 )
-from api.db.tables.users import User
+from api.db.tables.users import User, UserDisability
 from api.settings import settings
+from api.state import llm_client
+
+from ...common.batching import MicroBatcher
+from ...common.cache import ResponseCache
+from ...db.utils import (
+    distance,
+    empty_array,
+    json_build_object,
+    point,
+    within_bbox,
+)
+from .classifier import LocalFirstPass
+from .clusters import (
+    TILE_CELLS,
+    ClusterCache,
+    Tile,
+    cell_size,
+    tiles_bbox,
+    tiles_for_bbox,
+)
+from .events import node_events
+from .notifications import notify_node_changed
+from .predictions import (
+    BudgetedComments,
+    PredictionCache,
+    estimate_tokens,
+    fit_comments,
+    normalize_text,
+    parse_accessibility,
+    parse_batch_answer,
+    prediction_key,
+)
+from .schemas import (
+    BoundingBox,
+    ItemCursor,
+    NodeAccessibilityPropositionPageSchema,
+    NodeChangesSchema,
+    NodeClusterSchema,
+    NodeCommentPageSchema,
+    NodeEventSchema,
+    NodeListAdapter,
+    NodePredictionSchema,
+    NodeSchema,
+    PredictionJobSchema,
+    PredictionRunSchema,
+)
+
+logger = logging.getLogger(__name__)
 
-from ...db.utils import empty_array, json_build_object
-from .schemas import NodeSchema
+# Upper bound of tiles a single clusters request may cover.
+MAX_CLUSTER_TILES = 256
+# Rows fetched from the server-side cursor at a time when streaming nodes.
+STREAM_BATCH_SIZE = 500
+# Comments and propositions embedded in a node, the rest is paginated.
+# Changing it requires rebuilding the node summaries.
+EMBEDDED_ITEMS_LIMIT = 20
+# Seconds before the first retry of a failed prediction job, doubling with
+# every further attempt.
+PREDICTION_RETRY_DELAY = 10
+# Upper bound in seconds of the delay before a job postponed while the LLM
+# is unavailable is run again.
+PREDICTION_POSTPONE_MAX_DELAY = 600
+# Newest comments a prediction reads at most, on top of the node's
+# prediction state. Those sent are further limited by the token budget.
+PREDICTION_COMMENTS_LIMIT = 100
 
 
 async def create_comment(
@@ -22,6 +105,8 @@ async def create_comment(
     osm_id: str,
     user_id: int,
     text: str,
+    lat: float | None = None,
+    lon: float | None = None,
 ) -> int:
     query = (
         sql.insert(NodeComment)
@@ -29,21 +114,19 @@ async def create_comment(
             osm_id=osm_id,
             user_id=user_id,
             text=text,
+            lat=lat,
+            lon=lon,
         )
         .returning(NodeComment.id)
     )
     cursor_result = await db_conn.execute(query)
-    await db_conn.commit()
     comment_id = cursor_result.scalar_one()
-
-    node = await get_node(db_conn=db_conn, osm_id=osm_id)
-    comments = [c.text for c in node.comments]
-    accessibility = await predict_accessibility(text="\n".join(comments))
-    await update_node(
-        db_conn=db_conn,
-        osm_id=osm_id,
-        accessibility=accessibility,
-    )
+    event = NodeEventSchema(osm_id=osm_id, lat=lat, lon=lon)
+    await _refresh_node_summary(db_conn=db_conn, osm_id=osm_id)
+    await _request_prediction(db_conn=db_conn, osm_id=osm_id, lat=lat, lon=lon)
+    await notify_node_changed(db_conn=db_conn, event=event)
+    await db_conn.commit()
+    apply_node_change(event)
     return comment_id
 
 
@@ -52,128 +135,931 @@ async def delete_comment(
     user_id: int,
     comment_id: int,
 ) -> None:
-    query = sql.delete(NodeComment).where(
-        NodeComment.id == comment_id,
-        NodeComment.user_id == user_id,
+    query = (
+        sql.delete(NodeComment)
+        .where(
+            NodeComment.id == comment_id,
+            NodeComment.user_id == user_id,
+        )
+        .returning(NodeComment.osm_id)
+    )
+    cursor_result = await db_conn.execute(query)
+    osm_id = cursor_result.scalar_one_or_none()
+    if osm_id is None:
+        await db_conn.commit()
+        return
+
+    # A prediction cannot forget a comment, so one based on the deleted
+    # comment starts over from the latest comments. Predictions running now
+    # may have read it too, the new revision keeps them from being saved.
+    based_on_comment = NodePredictionState.comment_watermark >= comment_id
+    stmt = insert(NodePredictionState).values(osm_id=osm_id, revision=1)
+    query = stmt.on_conflict_do_update(
+        index_elements=["osm_id"],
+        set_={
+            "accessibility": sql.case(
+                (based_on_comment, None),
+                else_=NodePredictionState.accessibility,
+            ),
+            "comment_watermark": sql.case(
+                (based_on_comment, 0),
+                else_=NodePredictionState.comment_watermark,
+            ),
+            "revision": NodePredictionState.revision + 1,
+        },
     )
     await db_conn.execute(query)
+    event = NodeEventSchema(osm_id=osm_id)
+    await _create_tombstone(db_conn=db_conn, osm_id=osm_id)
+    await _refresh_node_summary(db_conn=db_conn, osm_id=osm_id)
+    await _request_prediction(db_conn=db_conn, osm_id=osm_id)
+    await notify_node_changed(db_conn=db_conn, event=event)
     await db_conn.commit()
+    apply_node_change(event)
 
 
 async def update_node(
     db_conn: AsyncConnection,
     osm_id: str,
     accessibility: NodeAccessibility,
+    lat: float | None = None,
+    lon: float | None = None,
+) -> None:
+    node = NodeEventSchema(
+        osm_id=osm_id,
+        accessibility=accessibility,
+        lat=lat,
+        lon=lon,
+    )
+    await update_nodes(db_conn=db_conn, nodes=[node])
+
+
+async def update_nodes(
+    db_conn: AsyncConnection,
+    nodes: list[NodeEventSchema],
 ) -> None:
-    stmt = insert(Node).values(osm_id=osm_id, accessibility=accessibility)
+    """Set the accessibility of several nodes in a single transaction."""
+
+    osm_ids = [node.osm_id for node in nodes]
+    query = sql.select(Node.osm_id, Node.lat, Node.lon).where(
+        Node.osm_id.in_(osm_ids)
+    )
+    cursor_result = await db_conn.execute(query)
+    locations = {osm_id: (lat, lon) for osm_id, lat, lon in cursor_result}
+
+    stmt = insert(Node).values(
+        [
+            {
+                "osm_id": node.osm_id,
+                "accessibility": node.accessibility,
+                "lat": node.lat,
+                "lon": node.lon,
+            }
+            for node in nodes
+        ]
+    )
     query = stmt.on_conflict_do_update(
         index_elements=["osm_id"],
-        set_={"accessibility": stmt.excluded.accessibility},
+        set_={
+            "accessibility": stmt.excluded.accessibility,
+            "lat": func.coalesce(stmt.excluded.lat, Node.lat),
+            "lon": func.coalesce(stmt.excluded.lon, Node.lon),
+            "xact_id": sql.literal_column(CURRENT_XACT_ID),
+        },
+    ).returning(Node.osm_id, Node.accessibility, Node.lat, Node.lon)
+    cursor_result = await db_conn.execute(query)
+    # Events carry where the nodes are now, which the caches are keyed by.
+    events = [
+        NodeEventSchema.model_validate(dict(row))
+        for row in cursor_result.mappings()
+    ]
+    # A moved node also changed the place it left.
+    moved = any(
+        event.osm_id in locations
+        and locations[event.osm_id] != (event.lat, event.lon)
+        for event in events
     )
-    await db_conn.execute(query)
+    await _refresh_node_summaries(db_conn=db_conn, osm_ids=osm_ids)
+    for event in events:
+        await notify_node_changed(db_conn=db_conn, event=event)
+    if moved:
+        await notify_node_changed(db_conn=db_conn, event=None)
     await db_conn.commit()
+    for event in events:
+        apply_node_change(event)
+    if moved:
+        apply_node_change(None)
 
 
-async def list_nodes(
-    db_conn: AsyncConnection,
-) -> list[NodeSchema]:
-    node_comments = (
-        sql.select(
-            NodeComment.osm_id,
-            func.array_agg(
-                aggregate_order_by(
-                    json_build_object(
-                        {
-                            "id": NodeComment.id,
-                            "user": json_build_object(
-                                {
-                                    "id": User.id,
-                                    "email": User.email,
-                                    "disabilities": User.disabilities,
-                                }
-                            ),
-                            "text": NodeComment.text,
-                            "created_at": NodeComment.created_at,
-                        }
-                    ),
-                    NodeComment.created_at.desc(),
-                )
-            ).label("comments"),
-        )
-        .join(User, User.id == NodeComment.user_id)
-        .group_by(NodeComment.osm_id)
-        .subquery()
+def apply_node_change(event: NodeEventSchema | None) -> None:
+    """
+    Bring this worker's caches and subscribers up to date with a change.
+
+    Write paths call it once their change is committed; changes made by
+    other workers arrive through `listen_node_changes`. `None` stands for
+    a change to any node.
+    """
+
+    nodes_cache.invalidate()
+    if event is None:
+        cluster_cache.clear()
+    elif event.accessibility is not None:
+        # Only the tiles containing the node change, when it is known where
+        # it is.
+        if event.lat is None or event.lon is None:
+            cluster_cache.clear()
+        else:
+            cluster_cache.evict_point(lat=event.lat, lon=event.lon)
+    if event is not None:
+        node_events.publish(event)
+
+
+NodeTable = type[Node] | type[NodeComment] | type[NodeAccessibilityProposition]
+NodeFilter = Callable[[NodeTable], ColumnElement[bool]]
+
+
+def _user_object() -> Function[Any]:
+    return json_build_object(
+        {
+            "id": User.id,
+            "email": User.email,
+            "disabilities": User.disabilities,
+        }
     )
 
-    node_accessibility_propositions = (
-        sql.select(
-            NodeAccessibilityProposition.osm_id,
-            func.array_agg(
-                aggregate_order_by(
-                    json_build_object(
-                        {
-                            "id": NodeAccessibilityProposition.id,
-                            "user": json_build_object(
-                                {
-                                    "id": User.id,
-                                    "email": User.email,
-                                    "disabilities": User.disabilities,
-                                }
-                            ),
-                            "accessibility": NodeAccessibilityProposition.accessibility,
-                            "text": NodeAccessibilityProposition.text,
-                            "created_at": NodeAccessibilityProposition.created_at,
-                        }
-                    ),
-                    NodeComment.created_at.desc(),
-                )
-            ).label("accessibility_propositions"),
-        )
-        .join(User, User.id == NodeAccessibilityProposition.user_id)
-        .group_by(NodeAccessibilityProposition.osm_id)
-        .subquery()
+
+def _user_reference(
+    table: type[NodeComment] | type[NodeAccessibilityProposition],
+    embed_users: bool,
+) -> dict[str, Any]:
+    if embed_users:
+        return {"user": _user_object()}
+    return {"user_id": table.user_id}
+
+
+def _comment_object(embed_users: bool = True) -> Function[Any]:
+    return json_build_object(
+        {
+            "id": NodeComment.id,
+            **_user_reference(NodeComment, embed_users),
+            "text": NodeComment.text,
+            "created_at": NodeComment.created_at,
+        }
     )
 
-    query = (
+
+def _proposition_object(embed_users: bool = True) -> Function[Any]:
+    return json_build_object(
+        {
+            "id": NodeAccessibilityProposition.id,
+            **_user_reference(NodeAccessibilityProposition, embed_users),
+            "accessibility": NodeAccessibilityProposition.accessibility,
+            "text": NodeAccessibilityProposition.text,
+            "created_at": NodeAccessibilityProposition.created_at,
+        }
+    )
+
+
+def _latest_items(
+    table: type[NodeComment] | type[NodeAccessibilityProposition],
+    item: Function[Any],
+    osm_id: ColumnElement[str],
+    embed_users: bool,
+) -> ColumnElement[Any]:
+    """
+    Array of the latest `EMBEDDED_ITEMS_LIMIT` items of the node `osm_id`.
+
+    Only those items are read and built, along the `osm_id, created_at, id`
+    index, however many the node has.
+    """
+
+    latest = (
+        sql.select(item)
+        .where(table.osm_id == osm_id)
+        .order_by(table.created_at.desc(), table.id.desc())
+        .limit(EMBEDDED_ITEMS_LIMIT)
+    )
+    if embed_users:
+        latest = latest.join(User, User.id == table.user_id)
+    return func.array(latest.scalar_subquery(), type_=ARRAY(JSON))
+
+
+def _count_items(
+    table: type[NodeComment] | type[NodeAccessibilityProposition],
+    where: NodeFilter | None,
+) -> sql.Subquery:
+    counts = sql.select(
+        table.osm_id,
+        func.count().label("count"),
+        func.max(table.lat).label("lat"),
+        func.max(table.lon).label("lon"),
+    ).group_by(table.osm_id)
+    if where is not None:
+        counts = counts.where(where(table))
+    return counts.subquery()
+
+
+def _select_nodes(
+    where: NodeFilter | None = None,
+    embed_users: bool = True,
+) -> sql.Select[Any]:
+    """
+    Build the query aggregating nodes with their comments and propositions.
+
+    `where` is applied to every source table separately, so the filter is
+    pushed down into the aggregations instead of being evaluated on the
+    joined result. Without `embed_users`, comments and propositions only
+    reference their author by `user_id`.
+    """
+
+    comment_counts = _count_items(NodeComment, where)
+    node_comments = sql.select(
+        comment_counts.c.osm_id,
+        _latest_items(
+            NodeComment,
+            _comment_object(embed_users),
+            osm_id=comment_counts.c.osm_id,
+            embed_users=embed_users,
+        ).label("comments"),
+        comment_counts.c.count.label("comments_count"),
+        comment_counts.c.lat,
+        comment_counts.c.lon,
+    )
+
+    proposition_counts = _count_items(NodeAccessibilityProposition, where)
+    node_accessibility_propositions = sql.select(
+        proposition_counts.c.osm_id,
+        _latest_items(
+            NodeAccessibilityProposition,
+            _proposition_object(embed_users),
+            osm_id=proposition_counts.c.osm_id,
+            embed_users=embed_users,
+        ).label("accessibility_propositions"),
+        proposition_counts.c.count.label("accessibility_propositions_count"),
+        proposition_counts.c.lat,
+        proposition_counts.c.lon,
+    )
+
+    nodes = sql.select(Node.osm_id, Node.accessibility, Node.lat, Node.lon)
+
+    if where is not None:
+        nodes = nodes.where(where(Node))
+
+    node_comments = node_comments.subquery()
+    node_accessibility_propositions = node_accessibility_propositions.subquery()
+    nodes = nodes.subquery()
+
+    return (
         sql.select(
             func.coalesce(
-                Node.osm_id,
+                nodes.c.osm_id,
                 node_comments.c.osm_id,
                 node_accessibility_propositions.c.osm_id,
             ).label("osm_id"),
-            Node.accessibility,
+            nodes.c.accessibility,
+            func.coalesce(
+                nodes.c.lat,
+                node_comments.c.lat,
+                node_accessibility_propositions.c.lat,
+            ).label("lat"),
+            func.coalesce(
+                nodes.c.lon,
+                node_comments.c.lon,
+                node_accessibility_propositions.c.lon,
+            ).label("lon"),
             func.coalesce(node_comments.c.comments, empty_array(JSON)).label(
                 "comments"
             ),
+            func.coalesce(node_comments.c.comments_count, 0).label(
+                "comments_count"
+            ),
             func.coalesce(
                 node_accessibility_propositions.c.accessibility_propositions,
                 empty_array(JSON),
             ).label("accessibility_propositions"),
+            func.coalesce(
+                node_accessibility_propositions.c.accessibility_propositions_count,
+                0,
+            ).label("accessibility_propositions_count"),
         )
+        .select_from(nodes)
         .join(
             node_comments,
-            Node.osm_id == node_comments.c.osm_id,
+            nodes.c.osm_id == node_comments.c.osm_id,
             full=True,
         )
         .join(
             node_accessibility_propositions,
-            Node.osm_id == node_accessibility_propositions.c.osm_id,
+            func.coalesce(nodes.c.osm_id, node_comments.c.osm_id)
+            == node_accessibility_propositions.c.osm_id,
             full=True,
         )
     )
 
+
+SUMMARY_COLUMNS = [
+    "osm_id",
+    "lat",
+    "lon",
+    "document",
+    "normalized_document",
+    "user_ids",
+    "updated_at",
+]
+
+
+def _select_node_summaries(where: NodeFilter | None = None) -> sql.Select[Any]:
+    nodes = _select_nodes(where=where).subquery()
+    normalized_nodes = _select_nodes(where=where, embed_users=False).subquery()
+    # Authors of the embedded items only, as the others are not referenced.
+    items = (
+        func.unnest(
+            func.array_cat(
+                normalized_nodes.c.comments,
+                normalized_nodes.c.accessibility_propositions,
+            )
+        )
+        .table_valued(sql.column("item", JSON))
+        .render_derived()
+    )
+    user_ids = sql.select(
+        func.array_agg(sql.distinct(items.c.item["user_id"].as_integer()))
+    ).scalar_subquery()
+    return sql.select(
+        nodes.c.osm_id,
+        nodes.c.lat,
+        nodes.c.lon,
+        func.to_jsonb(nodes.table_valued()).label("document"),
+        func.to_jsonb(normalized_nodes.table_valued()).label(
+            "normalized_document"
+        ),
+        func.coalesce(user_ids, empty_array(Integer)).label("user_ids"),
+        func.now().label("updated_at"),
+    ).join(normalized_nodes, normalized_nodes.c.osm_id == nodes.c.osm_id)
+
+
+async def _refresh_node_summary(db_conn: AsyncConnection, osm_id: str) -> None:
+    """
+    Recompute the summary document of a single node.
+
+    Runs in the caller's transaction, so the summary is committed together
+    with the change it reflects.
+    """
+
+    await _refresh_node_summaries(db_conn=db_conn, osm_ids=[osm_id])
+
+
+async def _refresh_node_summaries(
+    db_conn: AsyncConnection,
+    osm_ids: list[str],
+) -> None:
+    summaries = _select_node_summaries(
+        where=lambda table: table.osm_id.in_(osm_ids)
+    )
+    stmt = insert(NodeSummary).from_select(SUMMARY_COLUMNS, summaries)
+    query = stmt.on_conflict_do_update(
+        index_elements=["osm_id"],
+        set_={column: stmt.excluded[column] for column in SUMMARY_COLUMNS[1:]},
+    ).returning(NodeSummary.osm_id)
     cursor_result = await db_conn.execute(query)
-    results = cursor_result.mappings().all()
-    return TypeAdapter(list[NodeSchema]).validate_python(results)
+    gone = set(osm_ids) - set(cursor_result.scalars())
+    if gone:
+        query = sql.delete(NodeSummary).where(NodeSummary.osm_id.in_(gone))
+        await db_conn.execute(query)
+
+
+async def rebuild_node_summaries(db_conn: AsyncConnection) -> int:
+    """Recompute all summary documents from the source tables."""
 
+    await db_conn.execute(sql.delete(NodeSummary))
+    stmt = insert(NodeSummary).from_select(
+        SUMMARY_COLUMNS,
+        _select_node_summaries(),
+    )
+    cursor_result = await db_conn.execute(stmt.on_conflict_do_nothing())
+    await notify_node_changed(db_conn=db_conn, event=None)
+    await db_conn.commit()
+    apply_node_change(None)
+    return cursor_result.rowcount
+
+
+def _list_nodes_query(
+    bbox: BoundingBox | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+) -> sql.Select[Any]:
+    query = sql.select(NodeSummary.document)
+    if bbox is not None:
+        query = query.where(
+            within_bbox(
+                lon=NodeSummary.lon,
+                lat=NodeSummary.lat,
+                west=bbox.west,
+                south=bbox.south,
+                east=bbox.east,
+                north=bbox.north,
+            )
+        )
+    if limit is not None:
+        if after is not None:
+            query = query.where(NodeSummary.osm_id > after)
+        query = query.order_by(NodeSummary.osm_id).limit(limit)
+
+    return query
+
+
+async def list_nodes(
+    db_conn: AsyncConnection,
+    bbox: BoundingBox | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+) -> list[NodeSchema]:
+    """
+    List nodes, optionally restricted to `bbox`.
+
+    With `limit` set, returns one page of nodes ordered by osm_id, starting
+    right after the `after` osm_id.
+    """
+
+    query = _list_nodes_query(bbox=bbox, after=after, limit=limit)
+    cursor_result = await db_conn.execute(query)
+    documents = cursor_result.scalars().all()
+    return NodeListAdapter.validate_python(documents)
+
+
+async def list_nodes_json(
+    db_conn: AsyncConnection,
+    bbox: BoundingBox | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+    normalized: bool = False,
+) -> bytes:
+    """
+    Same as `list_nodes`, but returns the response body ready to be sent.
+
+    Summary documents are already in the shape of `NodeSchema`, so Postgres
+    assembles the JSON array (or the `NodePageSchema` object, with `limit`
+    set) and it is never parsed on our side.
+
+    With `normalized`, nodes reference users by `user_id` and the body is
+    an object with the nodes, a `users` map of every referenced user, built
+    once per response, and `next_after`.
+    """
+
+    query = _list_nodes_query(bbox=bbox, after=after, limit=limit)
+    if normalized:
+        query = query.with_only_columns(
+            NodeSummary.osm_id,
+            NodeSummary.normalized_document.label("document"),
+            NodeSummary.user_ids,
+        )
+    else:
+        query = query.with_only_columns(
+            NodeSummary.osm_id, NodeSummary.document
+        )
+    nodes = query.cte("page")
+
+    documents = sql.select(
+        func.coalesce(
+            func.json_agg(aggregate_order_by(nodes.c.document, nodes.c.osm_id)),
+            sql.literal_column("'[]'::json"),
+        )
+    ).scalar_subquery()
+    next_after = (
+        sql.select(
+            sql.case((func.count() == limit, func.max(nodes.c.osm_id)))
+        ).scalar_subquery()
+        if limit is not None
+        else sql.null()
+    )
+
+    if normalized:
+        users = (
+            sql.select(
+                func.coalesce(
+                    func.json_object_agg(User.id, _user_object()),
+                    sql.literal_column("'{}'::json"),
+                )
+            )
+            .where(User.id.in_(sql.select(func.unnest(nodes.c.user_ids))))
+            .scalar_subquery()
+        )
+        body = json_build_object(
+            {"nodes": documents, "users": users, "next_after": next_after}
+        )
+    elif limit is None:
+        body = documents
+    else:
+        body = json_build_object({"nodes": documents, "next_after": next_after})
+
+    query = sql.select(sql.cast(body, Text))
+    cursor_result = await db_conn.execute(query)
+    return cursor_result.scalar_one().encode()
+
+
+async def stream_nodes(
+    db_engine: AsyncEngine,
+    bbox: BoundingBox | None = None,
+    after: str | None = None,
+    limit: int | None = None,
+) -> AsyncIterator[NodeSchema]:
+    """
+    Same as `list_nodes`, but yields nodes as they are read from a
+    server-side cursor.
+
+    It uses its own connection, because the response is streamed after the
+    request's dependencies have already been closed.
+    """
+
+    query = _list_nodes_query(bbox=bbox, after=after, limit=limit)
+    async with db_engine.connect() as db_conn:
+        cursor_result = await db_conn.stream(
+            query.execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        async for document in cursor_result.scalars():
+            yield NodeSchema.model_validate(document)
+
+
+async def get_node(db_conn: AsyncConnection, osm_id: str) -> NodeSchema | None:
+    query = sql.select(NodeSummary.document).where(NodeSummary.osm_id == osm_id)
+    cursor_result = await db_conn.execute(query)
+    document = cursor_result.scalar_one_or_none()
+    if document is None:
+        return None
+
+    return NodeSchema.model_validate(document)
+
+
+async def get_nodes(
+    db_conn: AsyncConnection,
+    osm_ids: list[str],
+) -> list[NodeSchema | None]:
+    """
+    Fetch many nodes in one query.
+
+    Results follow the order of `osm_ids`, with `None` for ids that have no
+    node, comments or propositions.
+    """
+
+    if not osm_ids:
+        return []
+
+    ids = sql.bindparam("osm_ids", list(set(osm_ids)), type_=ARRAY(String))
+    query = sql.select(NodeSummary.document).where(
+        NodeSummary.osm_id == sql.any_(ids)
+    )
+    cursor_result = await db_conn.execute(query)
+    nodes = NodeListAdapter.validate_python(cursor_result.scalars().all())
+
+    nodes_by_id = {node.osm_id: node for node in nodes}
+    return [nodes_by_id.get(osm_id) for osm_id in osm_ids]
+
+
+async def list_node_comments(
+    db_conn: AsyncConnection,
+    osm_id: str,
+    limit: int,
+    before: ItemCursor | None = None,
+) -> NodeCommentPageSchema:
+    """Return a node's comments, latest first, older than `before`."""
+
+    documents = await _list_node_items(
+        db_conn=db_conn,
+        table=NodeComment,
+        item=_comment_object(),
+        osm_id=osm_id,
+        limit=limit,
+        before=before,
+    )
+    page = NodeCommentPageSchema(
+        comments=documents[:limit],
+        next_before=None,
+    )
+    if len(documents) > limit:
+        last = page.comments[-1]
+        page.next_before = ItemCursor(
+            created_at=last.created_at,
+            id=last.id,
+        ).to_string()
+    return page
+
+
+async def list_node_accessibility_propositions(
+    db_conn: AsyncConnection,
+    osm_id: str,
+    limit: int,
+    before: ItemCursor | None = None,
+) -> NodeAccessibilityPropositionPageSchema:
+    """Return a node's propositions, latest first, older than `before`."""
+
+    documents = await _list_node_items(
+        db_conn=db_conn,
+        table=NodeAccessibilityProposition,
+        item=_proposition_object(),
+        osm_id=osm_id,
+        limit=limit,
+        before=before,
+    )
+    page = NodeAccessibilityPropositionPageSchema(
+        accessibility_propositions=documents[:limit],
+        next_before=None,
+    )
+    if len(documents) > limit:
+        last = page.accessibility_propositions[-1]
+        page.next_before = ItemCursor(
+            created_at=last.created_at,
+            id=last.id,
+        ).to_string()
+    return page
+
+
+async def _list_node_items(
+    db_conn: AsyncConnection,
+    table: type[NodeComment] | type[NodeAccessibilityProposition],
+    item: Function[Any],
+    osm_id: str,
+    limit: int,
+    before: ItemCursor | None = None,
+) -> list[Any]:
+    """
+    Fetch up to `limit + 1` items of a node, so the caller can tell whether
+    there is another page.
+    """
+
+    query = (
+        sql.select(item)
+        .select_from(table)
+        .join(User, User.id == table.user_id)
+        .where(table.osm_id == osm_id)
+        .order_by(table.created_at.desc(), table.id.desc())
+        .limit(limit + 1)
+    )
+    if before is not None:
+        query = query.where(
+            sql.tuple_(table.created_at, table.id)
+            < sql.tuple_(sql.literal(before.created_at), sql.literal(before.id))
+        )
+    cursor_result = await db_conn.execute(query)
+    return list(cursor_result.scalars().all())
+
+
+async def list_nearest_nodes(
+    db_conn: AsyncConnection,
+    lat: float,
+    lon: float,
+    k: int,
+    accessibility: NodeAccessibility | None = None,
+    disabilities: list[UserDisability] | None = None,
+) -> list[NodeSchema]:
+    """
+    Return the `k` nodes closest to the given location.
+
+    When `disabilities` are given, only nodes commented on or rated by users
+    sharing at least one of them are considered.
+    """
+
+    query = (
+        sql.select(Node.osm_id)
+        .where(Node.lat.is_not(None), Node.lon.is_not(None))
+        .order_by(
+            distance(
+                point(lon=Node.lon, lat=Node.lat),
+                point(lon=lon, lat=lat),
+            )
+        )
+        .limit(k)
+    )
+    if accessibility is not None:
+        query = query.where(Node.accessibility == accessibility)
+    if disabilities:
+        tables: list[type[NodeComment] | type[NodeAccessibilityProposition]] = [
+            NodeComment,
+            NodeAccessibilityProposition,
+        ]
+        query = query.where(
+            sql.or_(
+                *(
+                    sql.exists()
+                    .where(
+                        table.osm_id == Node.osm_id,
+                        User.id == table.user_id,
+                        User.disabilities.op("&&")(
+                            sql.cast(disabilities, ARRAY(String))
+                        ),
+                    )
+                    .correlate(Node)
+                    for table in tables
+                )
+            )
+        )
+
+    cursor_result = await db_conn.execute(query)
+    osm_ids = list(cursor_result.scalars().all())
+    nodes = await get_nodes(db_conn=db_conn, osm_ids=osm_ids)
+    return [node for node in nodes if node is not None]
+
+
+SyncedTable = NodeTable | type[NodeTombstone]
+
+
+async def get_sync_token(db_conn: AsyncConnection) -> int:
+    """
+    Oldest transaction still running, used as an incremental sync token.
+
+    Every transaction with a smaller id has committed or rolled back, so
+    the writes below the token are all visible from now on, while those at
+    or above it may still be in flight.
+    """
+
+    xmin = func.pg_snapshot_xmin(func.pg_current_snapshot())
+    query = sql.select(sql.cast(sql.cast(xmin, Text), BigInteger))
+    cursor_result = await db_conn.execute(query)
+    return cursor_result.scalar_one()
+
+
+class SyncTokenExpiredError(Exception):
+    """The sync token predates pruned tombstones, so deletions are lost."""
+
+
+async def list_node_changes(
+    db_conn: AsyncConnection,
+    since: int,
+) -> NodeChangesSchema:
+    """
+    Return nodes written by transactions at or after the `since` sync token.
+
+    Nodes that no longer have any data are listed in `deleted`. Writes that
+    were in flight when the returned token was read are at or above it, so
+    they are sent on the next sync once committed, possibly again. Raises
+    `SyncTokenExpiredError` if deletions after `since` may have been pruned;
+    a `since` of 0 lists every node and never does.
+    """
+
+    token = await get_sync_token(db_conn=db_conn)
+
+    tables: list[SyncedTable] = [
+        Node,
+        NodeComment,
+        NodeAccessibilityProposition,
+        NodeTombstone,
+    ]
+    query = sql.union(
+        *(
+            sql.select(table.osm_id).where(table.xact_id >= since)
+            for table in tables
+        )
+    )
+    cursor_result = await db_conn.execute(query)
+    osm_ids = list(cursor_result.scalars().all())
+
+    # Read after the tombstones, so tombstones pruned in between are caught.
+    if since != 0:
+        query = sql.select(NodeSyncHorizon.min_token)
+        cursor_result = await db_conn.execute(query)
+        min_token = cursor_result.scalar_one_or_none()
+        if min_token is not None and since < min_token:
+            raise SyncTokenExpiredError()
+
+    nodes = await get_nodes(db_conn=db_conn, osm_ids=osm_ids)
+    return NodeChangesSchema(
+        nodes=[node for node in nodes if node is not None],
+        deleted=[
+            osm_id for osm_id, node in zip(osm_ids, nodes) if node is None
+        ],
+        token=token,
+    )
+
+
+async def prune_node_tombstones(
+    db_conn: AsyncConnection,
+    max_age: timedelta,
+) -> int:
+    """
+    Delete tombstones older than `max_age`, returning how many there were.
+
+    Sync tokens up to the newest pruned tombstone are rejected from then on,
+    as the deletions they would be sent are gone.
+    """
+
+    pruned = (
+        sql.delete(NodeTombstone)
+        .where(NodeTombstone.created_at < func.now() - max_age)
+        .returning(NodeTombstone.xact_id)
+        .cte("pruned")
+    )
+    query = sql.select(func.count(), func.max(pruned.c.xact_id))
+    cursor_result = await db_conn.execute(query)
+    count, xact_id = cursor_result.one()
+    if xact_id is not None:
+        stmt = insert(NodeSyncHorizon).values(min_token=xact_id + 1)
+        query = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "min_token": func.greatest(
+                    NodeSyncHorizon.min_token,
+                    stmt.excluded.min_token,
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await db_conn.execute(query)
+    await db_conn.commit()
+    return count
+
+
+nodes_cache = ResponseCache(
+    max_entries=settings.NODES_CACHE_MAX_ENTRIES,
+    max_bytes=settings.NODES_CACHE_MAX_BYTES,
+)
+cluster_cache = ClusterCache(maxsize=settings.NODE_CLUSTERS_CACHE_SIZE)
+
+
+async def list_node_clusters(
+    db_conn: AsyncConnection,
+    bbox: BoundingBox,
+    zoom: int,
+) -> list[NodeClusterSchema]:
+    """
+    Group nodes inside `bbox` into grid cells sized for the zoom level.
 
-async def get_node(db_conn: AsyncConnection, osm_id: str) -> NodeSchema:
-    nodes = await list_nodes(db_conn=db_conn)
-    node = next((n for n in nodes if n.osm_id == osm_id), None)
-    if node is None:
-        raise Exception("No node matches given osm_id")
+    Clusters are computed and cached per tile, so only tiles missing from the
+    cache are queried.
+    """
 
-    return node
+    tiles = tiles_for_bbox(bbox=bbox, zoom=zoom, limit=MAX_CLUSTER_TILES)
+    clusters_by_tile = {tile: cluster_cache.get(tile) for tile in tiles}
+    missing = [tile for tile, c in clusters_by_tile.items() if c is None]
+    if missing:
+        generation = cluster_cache.generation
+        computed = await _compute_node_clusters(db_conn=db_conn, tiles=missing)
+        for tile in missing:
+            clusters = computed.get(tile, [])
+            cluster_cache.set(tile, clusters, generation=generation)
+            clusters_by_tile[tile] = clusters
+
+    return [
+        cluster
+        for clusters in clusters_by_tile.values()
+        for cluster in clusters or []
+    ]
+
+
+async def _compute_node_clusters(
+    db_conn: AsyncConnection,
+    tiles: list[Tile],
+) -> dict[Tile, list[NodeClusterSchema]]:
+    zoom = tiles[0][0]
+    size = cell_size(zoom)
+    area = tiles_bbox(tiles)
+
+    x = func.floor(Node.lon / size).label("x")
+    y = func.floor(Node.lat / size).label("y")
+    query = (
+        sql.select(
+            x,
+            y,
+            func.avg(Node.lat).label("lat"),
+            func.avg(Node.lon).label("lon"),
+            func.count().label("count"),
+            *(
+                func.count()
+                .filter(Node.accessibility == accessibility)
+                .label(accessibility.value)
+                for accessibility in NodeAccessibility
+            ),
+        )
+        .where(
+            within_bbox(
+                lon=Node.lon,
+                lat=Node.lat,
+                west=area.west,
+                south=area.south,
+                east=area.east,
+                north=area.north,
+            )
+        )
+        .group_by(x, y)
+    )
+    cursor_result = await db_conn.execute(query)
+
+    requested = set(tiles)
+    clusters: dict[Tile, list[NodeClusterSchema]] = {}
+    for row in cursor_result.mappings():
+        x, y = int(row["x"]), int(row["y"])
+        tile = (zoom, x // TILE_CELLS, y // TILE_CELLS)
+        if tile not in requested:
+            continue
+
+        clusters.setdefault(tile, []).append(
+            NodeClusterSchema(
+                lat=row["lat"],
+                lon=row["lon"],
+                count=row["count"],
+                accessibility={a: row[a.value] for a in NodeAccessibility},
+            )
+        )
+
+    return clusters
 
 
 async def create_accessibility_proposition(
@@ -182,6 +1068,8 @@ async def create_accessibility_proposition(
     user_id: int,
     text: str,
     accessibility: NodeAccessibility,
+    lat: float | None = None,
+    lon: float | None = None,
 ) -> int:
     query = (
         sql.insert(NodeAccessibilityProposition)
@@ -190,11 +1078,24 @@ async def create_accessibility_proposition(
             user_id=user_id,
             text=text,
             accessibility=accessibility,
+            lat=lat,
+            lon=lon,
         )
         .returning(NodeAccessibilityProposition.id)
     )
     cursor_result = await db_conn.execute(query)
+    event = NodeEventSchema(osm_id=osm_id, lat=lat, lon=lon)
+    await _count_vote(
+        db_conn=db_conn,
+        osm_id=osm_id,
+        accessibility=accessibility,
+        delta=1,
+    )
+    await _refresh_node_summary(db_conn=db_conn, osm_id=osm_id)
+    await _request_prediction(db_conn=db_conn, osm_id=osm_id, lat=lat, lon=lon)
+    await notify_node_changed(db_conn=db_conn, event=event)
     await db_conn.commit()
+    apply_node_change(event)
     return cursor_result.scalar_one()
 
 
@@ -203,25 +1104,571 @@ async def delete_accessibility_proposition(
     user_id: int,
     proposition_id: int,
 ) -> None:
-    query = sql.delete(NodeAccessibilityProposition).where(
-        NodeAccessibilityProposition.id == proposition_id,
-        NodeAccessibilityProposition.user_id == user_id,
+    query = (
+        sql.delete(NodeAccessibilityProposition)
+        .where(
+            NodeAccessibilityProposition.id == proposition_id,
+            NodeAccessibilityProposition.user_id == user_id,
+        )
+        .returning(
+            NodeAccessibilityProposition.osm_id,
+            NodeAccessibilityProposition.accessibility,
+        )
+    )
+    cursor_result = await db_conn.execute(query)
+    row = cursor_result.one_or_none()
+    if row is None:
+        await db_conn.commit()
+        return
+
+    osm_id, accessibility = row
+    event = NodeEventSchema(osm_id=osm_id)
+    await _count_vote(
+        db_conn=db_conn,
+        osm_id=osm_id,
+        accessibility=accessibility,
+        delta=-1,
+    )
+    await _create_tombstone(db_conn=db_conn, osm_id=osm_id)
+    await _refresh_node_summary(db_conn=db_conn, osm_id=osm_id)
+    await _request_prediction(db_conn=db_conn, osm_id=osm_id)
+    await notify_node_changed(db_conn=db_conn, event=event)
+    await db_conn.commit()
+    apply_node_change(event)
+
+
+async def _create_tombstone(db_conn: AsyncConnection, osm_id: str) -> None:
+    await db_conn.execute(sql.insert(NodeTombstone).values(osm_id=osm_id))
+
+
+async def _request_prediction(
+    db_conn: AsyncConnection,
+    osm_id: str,
+    lat: float | None = None,
+    lon: float | None = None,
+) -> None:
+    """
+    Queue a re-prediction of the node's accessibility.
+
+    Runs in the caller's transaction, so the job exists if and only if the
+    change that requested it is committed.
+    """
+
+    stmt = insert(PredictionJob).values(osm_id=osm_id, lat=lat, lon=lon)
+    query = stmt.on_conflict_do_update(
+        index_elements=["osm_id"],
+        set_={
+            "lat": func.coalesce(stmt.excluded.lat, PredictionJob.lat),
+            "lon": func.coalesce(stmt.excluded.lon, PredictionJob.lon),
+            "attempts": 0,
+            "requested_at": func.now(),
+            "run_after": func.now(),
+        },
+    )
+    await db_conn.execute(query)
+
+
+async def claim_prediction_job(
+    db_conn: AsyncConnection,
+    lease: float,
+) -> PredictionJobSchema | None:
+    """
+    Lock the next due prediction job for `lease` seconds.
+
+    Jobs locked by other workers are skipped instead of waited for. A job
+    whose lease ran out, because its worker died, is due again.
+    """
+
+    now = func.now()
+    due = (
+        sql.select(PredictionJob.osm_id)
+        .where(
+            PredictionJob.run_after <= now,
+            sql.or_(
+                PredictionJob.locked_until.is_(None),
+                PredictionJob.locked_until < now,
+            ),
+        )
+        .order_by(PredictionJob.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    query = (
+        sql.update(PredictionJob)
+        .where(PredictionJob.osm_id == due.scalar_subquery())
+        .values(
+            locked_until=now + timedelta(seconds=lease),
+            attempts=PredictionJob.attempts + 1,
+        )
+        .returning(
+            PredictionJob.osm_id,
+            PredictionJob.lat,
+            PredictionJob.lon,
+            PredictionJob.attempts,
+            PredictionJob.requested_at,
+        )
+    )
+    cursor_result = await db_conn.execute(query)
+    row = cursor_result.mappings().one_or_none()
+    await db_conn.commit()
+    if row is None:
+        return None
+
+    return PredictionJobSchema.model_validate(dict(row))
+
+
+async def run_prediction_job(
+    db_engine: AsyncEngine,
+    job: PredictionJobSchema,
+) -> None:
+    prediction = await _predict_node(db_engine=db_engine, osm_id=job.osm_id)
+    async with db_engine.connect() as db_conn:
+        if prediction is not None:
+            saved = await _save_prediction_states(
+                db_conn=db_conn,
+                predictions=[prediction],
+            )
+            # Otherwise a comment was deleted meanwhile, and the prediction
+            # it requested will set the node.
+            if saved:
+                await update_node(
+                    db_conn=db_conn,
+                    osm_id=job.osm_id,
+                    accessibility=prediction.accessibility,
+                    lat=job.lat,
+                    lon=job.lon,
+                )
+
+        await _release_prediction_job(db_conn=db_conn, job=job, done=True)
+
+
+async def _predict_node(
+    db_engine: AsyncEngine,
+    osm_id: str,
+    start_over: bool = False,
+) -> NodePredictionSchema | None:
+    """
+    Predict the node's accessibility from its prediction state and the
+    comments added since, or from its latest comments if `start_over`.
+
+    What the prediction is based on is read first, on a connection released
+    before the model is asked. Returns `None` if there is nothing to
+    predict from.
+    """
+
+    query = sql.select(NodePredictionState).where(
+        NodePredictionState.osm_id == osm_id
+    )
+    async with db_engine.connect() as db_conn:
+        cursor_result = await db_conn.execute(query)
+        state = cursor_result.mappings().one_or_none()
+        previous = None
+        watermark = 0
+        votes = {}
+        revision = 0
+        if state is not None:
+            revision = state["revision"]
+            if not start_over:
+                previous = state["accessibility"]
+                watermark = state["comment_watermark"]
+            votes = {
+                accessibility: state[f"{accessibility.value}_votes"]
+                for accessibility in NodeAccessibility
+            }
+
+        query = (
+            sql.select(
+                NodeComment.id,
+                NodeComment.text,
+                NodeComment.lat,
+                NodeComment.lon,
+            )
+            .where(
+                NodeComment.osm_id == osm_id,
+                NodeComment.id > watermark,
+            )
+            .order_by(NodeComment.created_at.desc(), NodeComment.id.desc())
+            .limit(PREDICTION_COMMENTS_LIMIT)
+        )
+        cursor_result = await db_conn.execute(query)
+        comments = cursor_result.all()
+
+    if not comments and not any(votes.values()):
+        return None
+
+    description, budgeted = _prediction_text(
+        previous=previous,
+        votes=votes,
+        comments=[comment.text for comment in comments],
+        budget=settings.PREDICTION_PROMPT_TOKEN_BUDGET,
+    )
+    logger.info(
+        "Predicting %s from %d of %d comments, %d tokens saved",
+        osm_id,
+        len(budgeted.comments),
+        len(comments),
+        budgeted.tokens_saved,
+    )
+    accessibility = await predict_accessibility(
+        db_engine=db_engine,
+        text=description,
+        comments=budgeted.comments,
+    )
+    located = [comment for comment in comments if comment.lat is not None]
+    return NodePredictionSchema(
+        osm_id=osm_id,
+        accessibility=accessibility,
+        comment_watermark=max(
+            (comment.id for comment in comments),
+            default=watermark,
+        ),
+        lat=located[0].lat if located else None,
+        lon=located[0].lon if located else None,
+        revision=revision,
+    )
+
+
+async def _save_prediction_states(
+    db_conn: AsyncConnection,
+    predictions: list[NodePredictionSchema],
+) -> list[NodePredictionSchema]:
+    """
+    Save the states the predictions are based on, and return those saved.
+
+    A state whose revision changed since its prediction read it is left
+    alone, as is the prediction.
+    """
+
+    stmt = insert(NodePredictionState).values(
+        [
+            {
+                "osm_id": prediction.osm_id,
+                "accessibility": prediction.accessibility,
+                "comment_watermark": prediction.comment_watermark,
+                "revision": prediction.revision,
+            }
+            for prediction in predictions
+        ]
+    )
+    query = stmt.on_conflict_do_update(
+        index_elements=["osm_id"],
+        set_={
+            "accessibility": stmt.excluded.accessibility,
+            "comment_watermark": stmt.excluded.comment_watermark,
+        },
+        where=NodePredictionState.revision == stmt.excluded.revision,
+    ).returning(NodePredictionState.osm_id)
+    cursor_result = await db_conn.execute(query)
+    saved = set(cursor_result.scalars().all())
+    return [
+        prediction for prediction in predictions if prediction.osm_id in saved
+    ]
+
+
+def _prediction_text(
+    previous: NodeAccessibility | None,
+    votes: dict[NodeAccessibility, int],
+    comments: list[str],
+    budget: int,
+) -> tuple[str, BudgetedComments]:
+    """
+    Describe the node to the model in about `budget` tokens.
+
+    `comments` are sorted newest first, and the newest are preferred when
+    they do not all fit.
+    """
+
+    lines = []
+    if previous is not None:
+        lines.append(
+            "Accessibility assessed from earlier comments: "
+            + previous.value.upper()
+        )
+    if any(votes.values()):
+        lines.append(
+            "Accessibility proposed by visitors: "
+            + ", ".join(
+                f"{accessibility.value.upper()} {count}"
+                for accessibility, count in votes.items()
+            )
+        )
+    if comments:
+        lines.append("New comments:" if previous is not None else "Comments:")
+
+    budgeted = fit_comments(
+        comments,
+        budget=budget - estimate_tokens("\n".join(lines)),
+    )
+    return "\n".join(lines + budgeted.comments), budgeted
+
+
+async def _count_vote(
+    db_conn: AsyncConnection,
+    osm_id: str,
+    accessibility: NodeAccessibility,
+    delta: int,
+) -> None:
+    column = f"{accessibility.value}_votes"
+    stmt = insert(NodePredictionState).values(
+        osm_id=osm_id,
+        **{column: max(delta, 0)},
+    )
+    query = stmt.on_conflict_do_update(
+        index_elements=["osm_id"],
+        set_={column: getattr(NodePredictionState, column) + delta},
+    )
+    await db_conn.execute(query)
+
+
+async def fail_prediction_job(
+    db_conn: AsyncConnection,
+    job: PredictionJobSchema,
+    max_attempts: int,
+) -> None:
+    """Retry the job later with exponential backoff, up to `max_attempts`."""
+
+    await db_conn.rollback()
+    if job.attempts >= max_attempts:
+        await _release_prediction_job(db_conn=db_conn, job=job, done=True)
+        return
+
+    delay = timedelta(seconds=PREDICTION_RETRY_DELAY * 2 ** (job.attempts - 1))
+    query = (
+        sql.update(PredictionJob)
+        .where(
+            PredictionJob.osm_id == job.osm_id,
+            PredictionJob.requested_at == job.requested_at,
+        )
+        .values(run_after=func.now() + delay)
+    )
+    await db_conn.execute(query)
+    await _release_prediction_job(db_conn=db_conn, job=job, done=False)
+
+
+async def postpone_prediction_job(
+    db_conn: AsyncConnection,
+    job: PredictionJobSchema,
+) -> None:
+    """
+    Retry the job once the LLM may be available again, without counting
+    this as one of its attempts.
+
+    The delay grows with how long the job has been waiting, up to
+    `PREDICTION_POSTPONE_MAX_DELAY`, so no job is lost to an outage however
+    long it lasts.
+    """
+
+    await db_conn.rollback()
+    delay = func.least(
+        func.greatest(
+            func.now() - PredictionJob.requested_at,
+            timedelta(seconds=PREDICTION_RETRY_DELAY),
+        ),
+        timedelta(seconds=PREDICTION_POSTPONE_MAX_DELAY),
+    )
+    query = (
+        sql.update(PredictionJob)
+        .where(
+            PredictionJob.osm_id == job.osm_id,
+            PredictionJob.requested_at == job.requested_at,
+        )
+        .values(
+            run_after=func.now() + delay,
+            attempts=PredictionJob.attempts - 1,
+        )
+    )
+    await db_conn.execute(query)
+    await _release_prediction_job(db_conn=db_conn, job=job, done=False)
+
+
+async def _release_prediction_job(
+    db_conn: AsyncConnection,
+    job: PredictionJobSchema,
+    done: bool,
+) -> None:
+    """
+    Unlock the job, deleting it if `done`.
+
+    A job requested again while it was running is kept either way, so the
+    newer request is not lost.
+    """
+
+    if done:
+        query = sql.delete(PredictionJob).where(
+            PredictionJob.osm_id == job.osm_id,
+            PredictionJob.requested_at == job.requested_at,
+        )
+        await db_conn.execute(query)
+
+    query = (
+        sql.update(PredictionJob)
+        .where(PredictionJob.osm_id == job.osm_id)
+        .values(locked_until=None)
     )
     await db_conn.execute(query)
     await db_conn.commit()
 
 
-async def predict_accessibility(text: str) -> NodeAccessibility:
-    client = AsyncClient(
-        api_key=settings.OPENAI_API_KEY,
+async def start_prediction_run(
+    db_conn: AsyncConnection,
+    name: str,
+) -> PredictionRunSchema:
+    """Get the bulk re-prediction run called `name`, creating it if new."""
+
+    query = insert(PredictionRun).values(name=name).on_conflict_do_nothing()
+    await db_conn.execute(query)
+    query = sql.select(
+        PredictionRun.name,
+        PredictionRun.last_osm_id,
+        PredictionRun.predicted,
+    ).where(PredictionRun.name == name)
+    cursor_result = await db_conn.execute(query)
+    row = cursor_result.mappings().one()
+    await db_conn.commit()
+    return PredictionRunSchema.model_validate(dict(row))
+
+
+def _commented_node_ids(after: str | None) -> sql.Select[Any]:
+    query = sql.select(NodeComment.osm_id).distinct()
+    if after is not None:
+        query = query.where(NodeComment.osm_id > after)
+    return query
+
+
+async def count_nodes_to_repredict(
+    db_conn: AsyncConnection,
+    after: str | None,
+) -> int:
+    query = sql.select(func.count()).select_from(
+        _commented_node_ids(after=after).subquery()
+    )
+    cursor_result = await db_conn.execute(query)
+    return cursor_result.scalar_one()
+
+
+async def list_nodes_to_repredict(
+    db_conn: AsyncConnection,
+    after: str | None,
+    limit: int,
+) -> list[str]:
+    """Next `limit` nodes with comments after `after`, in `osm_id` order."""
+
+    query = (
+        _commented_node_ids(after=after)
+        .order_by(NodeComment.osm_id)
+        .limit(limit)
+    )
+    cursor_result = await db_conn.execute(query)
+    return list(cursor_result.scalars())
+
+
+async def repredict_node(
+    db_engine: AsyncEngine,
+    osm_id: str,
+) -> NodePredictionSchema | None:
+    """Predict the node's accessibility afresh, from its latest comments."""
+
+    return await _predict_node(
+        db_engine=db_engine,
+        osm_id=osm_id,
+        start_over=True,
+    )
+
+
+async def save_repredictions(
+    db_conn: AsyncConnection,
+    run_name: str,
+    last_osm_id: str,
+    predictions: list[NodePredictionSchema],
+) -> None:
+    """
+    Write re-predicted nodes and move the run's checkpoint to
+    `last_osm_id`, in a single transaction.
+    """
+
+    query = (
+        sql.update(PredictionRun)
+        .where(PredictionRun.name == run_name)
+        .values(
+            last_osm_id=last_osm_id,
+            predicted=PredictionRun.predicted + len(predictions),
+            updated_at=func.now(),
+        )
     )
-    prompt = f"""\
+    await db_conn.execute(query)
+    if not predictions:
+        await db_conn.commit()
+        return
+
+    predictions = await _save_prediction_states(
+        db_conn=db_conn,
+        predictions=predictions,
+    )
+    if not predictions:
+        await db_conn.commit()
+        return
+
+    await update_nodes(
+        db_conn=db_conn,
+        nodes=[
+            NodeEventSchema(
+                osm_id=prediction.osm_id,
+                accessibility=prediction.accessibility,
+                lat=prediction.lat,
+                lon=prediction.lon,
+            )
+            for prediction in predictions
+        ],
+    )
+
+
+async def load_training_examples(
+    db_conn: AsyncConnection,
+    limit: int,
+) -> list[tuple[str, NodeAccessibility]]:
+    """
+    The latest `limit` descriptions labelled with an accessibility level, to
+    train the local classifier.
+
+    Propositions carry their author's level, and comments the current level
+    of their node. That level may have been set by the local classifier
+    itself, which the threshold and the audits keep in check.
+    """
+
+    propositions = sql.select(
+        NodeAccessibilityProposition.text,
+        NodeAccessibilityProposition.accessibility,
+        NodeAccessibilityProposition.created_at,
+    )
+    comments = sql.select(
+        NodeComment.text,
+        Node.accessibility,
+        NodeComment.created_at,
+    ).join(Node, Node.osm_id == NodeComment.osm_id)
+    examples = sql.union_all(propositions, comments).subquery()
+    query = (
+        sql.select(examples.c.text, examples.c.accessibility)
+        .order_by(examples.c.created_at.desc())
+        .limit(limit)
+    )
+    cursor_result = await db_conn.execute(query)
+    return [
+        (normalize_text(text), accessibility)
+        for text, accessibility in cursor_result
+    ]
+
+
+PREDICTION_MODEL = "gpt-4o-mini"
+PREDICTION_LEVELS = """\
 You are an inclusivity expert with in-depth knowledge of accessibility standards for public and private spaces. Your task is to evaluate descriptions of locations and predict the level of accessibility based on the details provided. The possible accessibility levels are:
 
 - FULL: The location is fully accessible to all, including people with disabilities. It has all necessary facilities and modifications, such as ramps, elevators, accessible restrooms, clear signage, and wide entryways.
 - PARTIAL: The location has some accessible features but still presents obstacles or limitations that may prevent full access for some people with disabilities.
 - NONE: The location is not accessible. It lacks adequate facilities, modifications, or other features needed for accessibility.
-
+"""
+PREDICTION_PROMPT = (
+    PREDICTION_LEVELS
+    + """
 When you are provided with a location description, analyze it and predict one of the following: FULL, PARTIAL, or NONE. Output only a single strings that represents the accessibility level with no additional details and no double quotes around the result.
 
 Example Input:
@@ -230,15 +1677,132 @@ Example Input:
 Expected Output:
 "PARTIAL"
 
-Now, please predict the accessibility level and provide a short explanation for the following description:
+Now, please predict the accessibility level of the following description:
 ```{text}```
 """
+)
+# Items are sent as a JSON object, so descriptions cannot break the format.
+PREDICTION_BATCH_PROMPT = (
+    PREDICTION_LEVELS
+    + """
+You will be provided with a JSON object mapping ids to location descriptions. Analyze every description on its own and predict one of the following for it: FULL, PARTIAL, or NONE. Output only a JSON object mapping every id to its accessibility level, with no additional details.
 
-    response = await client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+Example Input:
+{{"1": "Step-free entrance, wide doors and an accessible restroom.", "2": "The only entrance is up a flight of stairs."}}
+
+Expected Output:
+{{"1": "FULL", "2": "NONE"}}
+
+Now, please predict the accessibility levels for the following descriptions:
+{items}
+"""
+)
+
+
+async def _predict_accessibility_batch(
+    texts: list[str],
+) -> list[NodeAccessibility | Exception]:
+    """
+    Predict several descriptions with one model call.
+
+    Descriptions the model did not answer properly for are predicted again
+    one by one. One that fails again gets its own exception, so it does not
+    fail the whole batch.
+    """
+
+    unique = list(dict.fromkeys(texts))
+    predictions: dict[str, NodeAccessibility | Exception] = {}
+    if len(unique) > 1:
+        items = {str(i): text for i, text in enumerate(unique, start=1)}
+        answer = await llm_client.complete(
+            model=PREDICTION_MODEL,
+            prompt=PREDICTION_BATCH_PROMPT.format(items=json.dumps(items)),
+        )
+        results = parse_batch_answer(answer, count=len(unique))
+        predictions = {
+            text: accessibility
+            for text, accessibility in zip(unique, results)
+            if accessibility is not None
+        }
+        if len(predictions) < len(unique):
+            logger.warning(
+                "Predicting %d of %d batched descriptions again one by one",
+                len(unique) - len(predictions),
+                len(unique),
+            )
+
+    async def predict_one(text: str) -> NodeAccessibility | Exception:
+        try:
+            answer = await llm_client.complete(
+                model=PREDICTION_MODEL,
+                prompt=PREDICTION_PROMPT.format(text=text),
+            )
+            return parse_accessibility(answer)
+        except Exception as e:
+            return e
+
+    missing = [text for text in unique if text not in predictions]
+    answers = await asyncio.gather(*map(predict_one, missing))
+    predictions.update(zip(missing, answers))
+    return [predictions[text] for text in texts]
+
+
+prediction_cache = PredictionCache(maxsize=settings.PREDICTION_CACHE_SIZE)
+local_first_pass = LocalFirstPass(
+    threshold=settings.PREDICTION_LOCAL_THRESHOLD,
+    audit_rate=settings.PREDICTION_LOCAL_AUDIT_RATE,
+)
+# Concurrent predictions share model calls.
+prediction_batcher = MicroBatcher(
+    handle=_predict_accessibility_batch,
+    max_size=settings.PREDICTION_BATCH_SIZE,
+    max_wait=settings.PREDICTION_BATCH_WAIT_SECONDS,
+)
+
+
+async def predict_accessibility(
+    db_engine: AsyncEngine,
+    text: str,
+    comments: list[str] | None = None,
+) -> NodeAccessibility:
+    """
+    Predict the accessibility of a place from its description.
+
+    Predictions are cached by the normalized text, the model and the
+    prompts, so the same description is only sent to the model once.
+    Descriptions missing from the cache are answered by the local
+    classifier when it is confident, and otherwise batched with the ones
+    other callers are waiting for.
+
+    The local classifier is trained on bare comment texts, so when the
+    description is built around `comments`, it only sees those, and is not
+    asked at all if there are none.
+    """
+
+    text = normalize_text(text)
+    key = prediction_key(
+        text=text,
+        model=PREDICTION_MODEL,
+        prompt=PREDICTION_PROMPT + PREDICTION_BATCH_PROMPT,
+    )
+    accessibility = await prediction_cache.get(db_engine=db_engine, key=key)
+    if accessibility is not None:
+        return accessibility
+
+    local_text = (
+        text if comments is None else normalize_text("\n".join(comments))
+    )
+    guess = local_first_pass.classify(local_text) if local_text else None
+    if local_first_pass.settle(guess):
+        assert guess is not None
+        return guess.accessibility
+
+    accessibility = await prediction_batcher.submit(text)
+    local_first_pass.compare(guess, accessibility)
+
+    await prediction_cache.set(
+        db_engine=db_engine,
+        key=key,
+        accessibility=accessibility,
     )
-    result = response.choices[0].message.content
-    assert result is not None
-    result = result.strip('"')
-    return NodeAccessibility(result.lower())
+    return accessibility
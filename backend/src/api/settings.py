@@ -8,6 +8,48 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
     OPENAI_API_KEY: str
+    # Points the LLM client at another OpenAI compatible server, e.g. a stub.
+    OPENAI_BASE_URL: str | None = None
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SECONDS: float = 30
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_DELAY_SECONDS: float = 0.5
+    LLM_CIRCUIT_FAILURES: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30
+    WEB_CONCURRENCY: int = 1
+    NODE_CHANGES_RECONNECT_SECONDS: float = 5
+    NODE_CLUSTERS_CACHE_SIZE: int = 4096
+    NODE_EVENTS_QUEUE_SIZE: int = 100
+    NODE_EVENTS_KEEPALIVE_SECONDS: float = 15
+    # Deletions are listed to syncing clients for this many days, after which
+    # clients holding an older token have to sync everything again.
+    NODE_TOMBSTONES_RETENTION_DAYS: float = 90
+    NODE_TOMBSTONES_PRUNE_SECONDS: float = 3600
+    NODES_CACHE_MAX_ENTRIES: int = 256
+    NODES_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Accessibility prediction workers run by every API process.
+    PREDICTION_WORKERS: int = 8
+    PREDICTION_POLL_SECONDS: float = 1
+    PREDICTION_LEASE_SECONDS: float = 300
+    PREDICTION_MAX_ATTEMPTS: int = 5
+    PREDICTION_CACHE_SIZE: int = 10000
+    # Predictions stored in the database are dropped after this many days,
+    # checked every `PREDICTION_CACHE_PRUNE_SECONDS`.
+    PREDICTION_CACHE_TTL_DAYS: float = 30
+    PREDICTION_CACHE_PRUNE_SECONDS: float = 3600
+    # The local classifier answers when it is at least this confident, and
+    # `PREDICTION_LOCAL_AUDIT_RATE` of its answers are checked with the LLM.
+    PREDICTION_LOCAL_THRESHOLD: float = 0.9
+    PREDICTION_LOCAL_AUDIT_RATE: float = 0.05
+    PREDICTION_LOCAL_MIN_EXAMPLES: int = 200
+    # Only the latest examples are trained on, which bounds training time.
+    PREDICTION_LOCAL_MAX_EXAMPLES: int = 20000
+    PREDICTION_LOCAL_RETRAIN_SECONDS: float = 3600
+    # Approximate tokens a node description sent for prediction may take.
+    PREDICTION_PROMPT_TOKEN_BUDGET: int = 1000
+    # Predictions made at the same time are sent to the model together.
+    PREDICTION_BATCH_SIZE: int = 16
+    PREDICTION_BATCH_WAIT_SECONDS: float = 0.05
 
     model_config = SettingsConfigDict(
         env_file=find_dotenv(".env", usecwd=True),
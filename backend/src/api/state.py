@@ -3,8 +3,9 @@ from typing import Annotated
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 
-from .db.utils import get_db_url
 from .common.authentication import AuthenticatedUser
+from .common.llm import CircuitBreaker, LLMClient
+from .db.utils import get_db_url
 from .settings import settings
 
 db_engine = create_async_engine(
@@ -12,6 +13,19 @@ db_engine = create_async_engine(
     pool_size=15,
 )
 
+llm_client = LLMClient(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    timeout=settings.LLM_TIMEOUT_SECONDS,
+    max_retries=settings.LLM_MAX_RETRIES,
+    retry_delay=settings.LLM_RETRY_DELAY_SECONDS,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.LLM_CIRCUIT_FAILURES,
+        reset_timeout=settings.LLM_CIRCUIT_RESET_SECONDS,
+    ),
+)
+
 
 async def get_db_conn():
     async with db_engine.connect() as conn:
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from api.common.batching import MicroBatcher
+
+
+class Recorder:
+    """Handles batches by doubling items, remembering every batch."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[int]] = []
+
+    async def handle(self, items: list[int]) -> list[int | Exception]:
+        self.batches.append(items)
+        return [ValueError(item) if item < 0 else item * 2 for item in items]
+
+
+def test_full_batch_is_handled_without_waiting() -> None:
+    recorder = Recorder()
+
+    async def run() -> list[int]:
+        batcher = MicroBatcher(recorder.handle, max_size=3, max_wait=60)
+        async with asyncio.timeout(1):
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+
+    assert asyncio.run(run()) == [0, 2, 4]
+    assert recorder.batches == [[0, 1, 2]]
+
+
+def test_batches_are_split_by_size() -> None:
+    recorder = Recorder()
+
+    async def run() -> list[int]:
+        batcher = MicroBatcher(recorder.handle, max_size=2, max_wait=0.05)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert recorder.batches == [[0, 1], [2, 3], [4]]
+
+
+def test_partial_batch_is_handled_after_max_wait() -> None:
+    recorder = Recorder()
+
+    async def run() -> float:
+        batcher = MicroBatcher(recorder.handle, max_size=10, max_wait=0.1)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+        return loop.time() - start
+
+    assert asyncio.run(run()) >= 0.1
+    assert recorder.batches == [[1, 2]]
+
+
+def test_exceptions_reach_their_callers() -> None:
+    recorder = Recorder()
+
+    async def run() -> tuple[int | BaseException, int | BaseException]:
+        batcher = MicroBatcher(recorder.handle, max_size=2, max_wait=60)
+        return await asyncio.gather(
+            batcher.submit(-1),
+            batcher.submit(1),
+            return_exceptions=True,
+        )
+
+    failed, succeeded = asyncio.run(run())
+    assert isinstance(failed, ValueError)
+    assert succeeded == 2
+
+
+def test_failed_batch_fails_every_caller() -> None:
+    async def handle(items: list[int]) -> list[int | Exception]:
+        raise RuntimeError("unavailable")
+
+    async def run() -> None:
+        batcher = MicroBatcher(handle, max_size=2, max_wait=60)
+        for result in await asyncio.gather(
+            batcher.submit(1),
+            batcher.submit(2),
+            return_exceptions=True,
+        ):
+            assert isinstance(result, RuntimeError)
+
+    asyncio.run(run())
+
+
+def test_cancelled_items_are_dropped() -> None:
+    recorder = Recorder()
+
+    async def run() -> int:
+        batcher = MicroBatcher(recorder.handle, max_size=10, max_wait=0.05)
+        cancelled = asyncio.create_task(batcher.submit(1))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await batcher.submit(2)
+
+    assert asyncio.run(run()) == 4
+    assert recorder.batches == [[2]]
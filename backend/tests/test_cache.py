@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from api.common.cache import ResponseCache, negotiate_content_coding
+
+AVAILABLE = ["br", "gzip"]
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("GZIP", "gzip"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0.1", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.5, gzip", "gzip"),
+        ("*, br;q=0", "gzip"),
+        ("gzip;q=invalid, br;q=0.1", "br"),
+        (" gzip ; q=0.8 ,br ; q=0.9", "br"),
+    ],
+)
+def test_negotiate_content_coding(
+    accept_encoding: str, expected: str | None
+) -> None:
+    assert negotiate_content_coding(accept_encoding, AVAILABLE) == expected
+
+
+def test_negotiate_content_coding_without_compressed_versions() -> None:
+    assert negotiate_content_coding("gzip, br", []) is None
+
+
+class Renderer:
+    """Renders numbered bodies once released, counting the renders."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def render(self) -> bytes:
+        self.calls += 1
+        body = b"body %d" % self.calls
+        await self.release.wait()
+        return body
+
+
+def test_response_cache_shares_concurrent_misses() -> None:
+    async def run() -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        renderer = Renderer()
+        waiting = [
+            asyncio.create_task(cache.get_or_compute("key", renderer.render))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        renderer.release.set()
+        bodies = {cached.body for cached in await asyncio.gather(*waiting)}
+        assert bodies == {b"body 1"}
+
+        cached = await cache.get_or_compute("key", renderer.render)
+        assert cached.body == b"body 1"
+        assert renderer.calls == 1
+
+    asyncio.run(run())
+
+
+def test_response_cache_survives_cancelled_caller() -> None:
+    async def run() -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        renderer = Renderer()
+        cancelled = asyncio.create_task(
+            cache.get_or_compute("key", renderer.render)
+        )
+        waiting = asyncio.create_task(
+            cache.get_or_compute("key", renderer.render)
+        )
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        renderer.release.set()
+
+        assert (await waiting).body == b"body 1"
+        assert renderer.calls == 1
+
+    asyncio.run(run())
+
+
+def test_response_cache_invalidation() -> None:
+    async def run() -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        renderer = Renderer()
+        renderer.release.set()
+        await cache.get_or_compute("key", renderer.render)
+
+        cache.invalidate()
+        assert (await cache.get_or_compute("key", renderer.render)).body == (
+            b"body 2"
+        )
+
+    asyncio.run(run())
+
+
+def test_response_cache_does_not_store_stale_computation() -> None:
+    async def run() -> None:
+        cache = ResponseCache(max_entries=10, max_bytes=1024)
+        renderer = Renderer()
+        stale = asyncio.create_task(
+            cache.get_or_compute("key", renderer.render)
+        )
+        await asyncio.sleep(0.01)
+
+        # Callers arriving after invalidation must not wait for the
+        # computation started before it.
+        cache.invalidate()
+        fresh = asyncio.create_task(
+            cache.get_or_compute("key", renderer.render)
+        )
+        await asyncio.sleep(0.01)
+        assert renderer.calls == 2
+
+        renderer.release.set()
+        assert (await stale).body == b"body 1"
+        assert (await fresh).body == b"body 2"
+        cached = await cache.get_or_compute("key", renderer.render)
+        assert renderer.calls == 2
+        assert cached is await fresh
+
+    asyncio.run(run())
+
+
+def test_response_cache_evicts_least_recently_used() -> None:
+    async def run() -> None:
+        cache = ResponseCache(max_entries=2, max_bytes=1024)
+
+        async def render(key: str) -> bytes:
+            renders.append(key)
+            return key.encode()
+
+        renders: list[str] = []
+        for key in ["a", "b", "a", "c", "a", "b"]:
+            await cache.get_or_compute(key, lambda: render(key))
+        assert renders == ["a", "b", "c", "b"]
+
+    asyncio.run(run())
@@ -0,0 +1,110 @@
+import pytest
+
+from api.routes.core.clusters import (
+    ClusterCache,
+    cell_size,
+    tile_at,
+    tile_size,
+    tiles_bbox,
+    tiles_for_bbox,
+)
+from api.routes.core.schemas import BoundingBox, NodeClusterSchema
+
+POINTS = [(52.52, 13.405), (-33.87, 151.21), (40.71, -74.01), (0, 0)]
+
+
+def test_tile_size_halves_with_every_zoom() -> None:
+    assert tile_size(0) == 360
+    assert tile_size(1) == 180
+    assert tile_size(10) == 360 / 1024
+    assert cell_size(10) < tile_size(10)
+
+
+@pytest.mark.parametrize("zoom", [0, 3, 12, 18])
+@pytest.mark.parametrize(("lat", "lon"), POINTS)
+def test_tile_at_contains_point(lat: float, lon: float, zoom: int) -> None:
+    tile = tile_at(lat=lat, lon=lon, zoom=zoom)
+
+    assert tile[0] == zoom
+    assert tiles_bbox([tile]).contains(lat=lat, lon=lon)
+
+
+def test_tiles_for_bbox_cover_bbox() -> None:
+    bbox = BoundingBox(west=13.3, south=52.45, east=13.5, north=52.55)
+
+    tiles = tiles_for_bbox(bbox, zoom=10, limit=100)
+
+    assert len(tiles) == len(set(tiles))
+    covering = tiles_bbox(tiles)
+    assert covering.west <= bbox.west and covering.east >= bbox.east
+    assert covering.south <= bbox.south and covering.north >= bbox.north
+    # Every tile overlaps the box, so no more are fetched than needed.
+    for tile in tiles:
+        tile_bbox = tiles_bbox([tile])
+        assert tile_bbox.west <= bbox.east and tile_bbox.east >= bbox.west
+        assert tile_bbox.south <= bbox.north and tile_bbox.north >= bbox.south
+
+
+def test_tiles_for_bbox_agree_with_tile_at() -> None:
+    bbox = BoundingBox(west=-74.1, south=40.6, east=-73.9, north=40.8)
+    tiles = set(tiles_for_bbox(bbox, zoom=12, limit=100))
+
+    for lat, lon in [(40.61, -74.09), (40.79, -73.91), (40.71, -74.01)]:
+        assert tile_at(lat=lat, lon=lon, zoom=12) in tiles
+
+
+def test_tiles_for_bbox_limit() -> None:
+    # Crosses the equator and the prime meridian.
+    bbox = BoundingBox(west=-10, south=-10, east=10, north=10)
+
+    with pytest.raises(ValueError):
+        tiles_for_bbox(bbox, zoom=0, limit=3)
+    assert tiles_for_bbox(bbox, zoom=0, limit=4) == [
+        (0, -1, -1),
+        (0, -1, 0),
+        (0, 0, -1),
+        (0, 0, 0),
+    ]
+
+
+def cluster(lat: float, lon: float) -> NodeClusterSchema:
+    return NodeClusterSchema(lat=lat, lon=lon, count=1, accessibility={})
+
+
+def test_cluster_cache_evicts_tiles_of_every_zoom() -> None:
+    cache = ClusterCache(maxsize=10)
+    berlin, sydney = POINTS[0], POINTS[1]
+    for zoom in (3, 12):
+        for lat, lon in (berlin, sydney):
+            tile = tile_at(lat=lat, lon=lon, zoom=zoom)
+            cache.set(tile, [cluster(lat, lon)], generation=cache.generation)
+
+    cache.evict_point(*berlin)
+
+    for zoom in (3, 12):
+        assert cache.get(tile_at(*berlin, zoom=zoom)) is None
+        assert cache.get(tile_at(*sydney, zoom=zoom)) is not None
+
+
+def test_cluster_cache_skips_tiles_computed_across_eviction() -> None:
+    cache = ClusterCache(maxsize=10)
+    tile = tile_at(*POINTS[0], zoom=12)
+    generation = cache.generation
+
+    cache.evict_point(*POINTS[1])
+    cache.set(tile, [cluster(*POINTS[0])], generation=generation)
+
+    assert cache.get(tile) is None
+
+
+def test_cluster_cache_evicts_least_recently_used() -> None:
+    cache = ClusterCache(maxsize=2)
+    tiles = [(12, x, 0) for x in range(3)]
+    cache.set(tiles[0], [], generation=cache.generation)
+    cache.set(tiles[1], [], generation=cache.generation)
+    cache.get(tiles[0])
+    cache.set(tiles[2], [], generation=cache.generation)
+
+    assert cache.get(tiles[0]) is not None
+    assert cache.get(tiles[1]) is None
+    assert cache.get(tiles[2]) is not None
@@ -0,0 +1,138 @@
+import asyncio
+import socket
+import threading
+from typing import Iterator
+
+import pytest
+import uvicorn
+from openai import NotFoundError
+
+from api.commands.openai_stub import create_app
+from api.common.llm import CircuitBreaker, LLMClient, LLMUnavailableError
+
+MODEL = "gpt-4o-mini"
+
+
+@pytest.fixture(scope="module")
+def stub_url() -> Iterator[str]:
+    """Serve the OpenAI stub in the background, answering after 0.5 s."""
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    host, port = sock.getsockname()
+    config = uvicorn.Config(
+        create_app(latency=0.5, fail_rate=0),
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]})
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("The OpenAI stub did not start")
+            threading.Event().wait(0.01)
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def make_client(base_url: str, breaker: CircuitBreaker) -> LLMClient:
+    return LLMClient(
+        api_key="test",
+        base_url=base_url,
+        max_concurrency=4,
+        timeout=5,
+        max_retries=0,
+        retry_delay=0,
+        breaker=breaker,
+    )
+
+
+def open_breaker() -> CircuitBreaker:
+    """A breaker that lets the next call through as its trial."""
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.is_open
+    return breaker
+
+
+def test_complete(stub_url: str) -> None:
+    async def run() -> str:
+        client = make_client(f"{stub_url}/v1", CircuitBreaker(1, 60))
+        try:
+            return await client.complete(MODEL, "Ramp at the entrance")
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) in {"FULL", "PARTIAL", "NONE"}
+
+
+def test_trial_success_closes_breaker(stub_url: str) -> None:
+    breaker = open_breaker()
+
+    async def run() -> None:
+        client = make_client(f"{stub_url}/v1", breaker)
+        try:
+            await client.complete(MODEL, "Ramp at the entrance")
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert not breaker.is_open
+
+
+def test_trial_unavailable_keeps_breaker_open(stub_url: str) -> None:
+    breaker = open_breaker()
+    breaker.reset_timeout = 60
+
+    async def run() -> None:
+        client = make_client(f"{stub_url}/v1", breaker)
+        try:
+            with pytest.raises(LLMUnavailableError):
+                await client.complete(MODEL, "Ramp at the entrance")
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert breaker.is_open
+
+
+def test_trial_settled_on_non_transient_error(stub_url: str) -> None:
+    breaker = open_breaker()
+
+    async def run() -> None:
+        # Answered with 404, which is not retried.
+        client = make_client(f"{stub_url}/missing/v1", breaker)
+        try:
+            for _ in range(2):
+                with pytest.raises(NotFoundError):
+                    await client.complete(MODEL, "Ramp at the entrance")
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+
+def test_trial_settled_on_cancellation(stub_url: str) -> None:
+    breaker = open_breaker()
+
+    async def run() -> str:
+        client = make_client(f"{stub_url}/v1", breaker)
+        try:
+            task = asyncio.create_task(
+                client.complete(MODEL, "Ramp at the entrance")
+            )
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            return await client.complete(MODEL, "Ramp at the entrance")
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) in {"FULL", "PARTIAL", "NONE"}
+    assert not breaker.is_open
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from starlette.types import Message, Receive, Scope, Send
+
+from api.common.authentication import authenticated_route
+from api.main import app
+from api.middlewares import JWTAuthenticationMiddleware
+
+
+async def passed(scope: Scope, receive: Receive, send: Send) -> None:
+    """Stands in for the app, answering 200 to whatever gets through."""
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def request_status(
+    middleware: JWTAuthenticationMiddleware,
+    target: FastAPI,
+    method: str,
+    path: str,
+) -> int:
+    """Status of an unauthenticated request, 401 if it was rejected."""
+
+    scope: Scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "app": target,
+    }
+    messages: list[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0]["status"]
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "authenticated"),
+    [
+        ("POST", "/api/auth/login", False),
+        ("POST", "/api/auth/register", False),
+        ("GET", "/api/auth/me", True),
+        ("GET", "/api/disabilities", False),
+        ("POST", "/api/comments", True),
+        ("DELETE", "/api/comments/1", True),
+        ("GET", "/api/nodes", False),
+        ("GET", "/api/nodes/clusters", False),
+        ("GET", "/api/nodes/node/123", False),
+        ("GET", "/api/nodes/node/123/comments", False),
+        ("PATCH", "/api/nodes/node/123", True),
+        ("POST", "/api/accessibility_propositions", True),
+        ("DELETE", "/api/accessibility_propositions/1", True),
+        ("POST", "/api/predict_accessibility", False),
+        ("GET", "/api/predict_accessibility/cache", True),
+        ("GET", "/api/predict_accessibility/classifier", True),
+        ("GET", "/api/missing", False),
+        ("GET", "/", False),
+    ],
+)
+def test_app_routes(method: str, path: str, authenticated: bool) -> None:
+    middleware = JWTAuthenticationMiddleware(passed)
+
+    status = request_status(middleware, app, method, path)
+
+    assert status == (401 if authenticated else 200)
+
+
+def make_app() -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/items/{id}")
+    async def get_item(id: str) -> None: ...
+
+    # Shadowed by the public route above for GET.
+    @router.get("/items/mine")
+    @authenticated_route
+    async def get_my_items() -> None: ...
+
+    @router.put("/items/{id}")
+    @authenticated_route
+    async def put_item(id: str) -> None: ...
+
+    target = FastAPI()
+    target.include_router(router, prefix="/api")
+    return target
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "authenticated"),
+    [
+        ("GET", "/api/items/1", False),
+        ("GET", "/api/items/mine", False),
+        ("PUT", "/api/items/1", True),
+        ("PUT", "/api/items/mine", True),
+        ("DELETE", "/api/items/1", False),
+        ("PUT", "/items/1", False),
+    ],
+)
+def test_first_matching_route_wins(
+    method: str, path: str, authenticated: bool
+) -> None:
+    middleware = JWTAuthenticationMiddleware(passed)
+
+    status = request_status(middleware, make_app(), method, path)
+
+    assert status == (401 if authenticated else 200)
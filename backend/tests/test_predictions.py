@@ -0,0 +1,98 @@
+import pytest
+
+from api.db.tables.core import NodeAccessibility
+from api.routes.core.predictions import (
+    MIN_TRUNCATED_TOKENS,
+    estimate_tokens,
+    fit_comments,
+    parse_batch_answer,
+)
+
+
+def test_fit_comments_keeps_everything_within_budget() -> None:
+    comments = ["Step at the door", "Ramp  at the\n\nback entrance"]
+
+    budgeted = fit_comments(comments, budget=1000)
+
+    # Oldest first, with whitespace collapsed.
+    assert budgeted.comments == [
+        "Ramp at the\nback entrance",
+        "Step at the door",
+    ]
+    assert budgeted.tokens_saved == 0
+
+
+def test_fit_comments_drops_duplicates_of_newer_comments() -> None:
+    comments = [
+        "The ramp at the back entrance of the building is too steep",
+        "the ramp at the  back entrance of the building is too steep!",
+        "The ramp at the back entrance of the building is very steep",
+        "Toilets are accessible",
+    ]
+
+    budgeted = fit_comments(comments, budget=1000)
+
+    assert budgeted.comments == [
+        "Toilets are accessible",
+        "The ramp at the back entrance of the building is too steep",
+    ]
+    assert budgeted.tokens_saved > 0
+
+
+def test_fit_comments_truncates_the_first_comment_that_does_not_fit() -> None:
+    newest = "Wide doors and a lift to every floor"
+    older = " ".join(f"word{i}" for i in range(200))
+    budget = estimate_tokens(newest) + MIN_TRUNCATED_TOKENS
+
+    budgeted = fit_comments([newest, older, "Oldest comment"], budget=budget)
+
+    assert len(budgeted.comments) == 2
+    truncated, kept = budgeted.comments
+    assert kept == newest
+    assert truncated.endswith(" ...")
+    # Cut at a word boundary.
+    assert older.startswith(truncated.removesuffix(" ..."))
+    assert truncated.removesuffix(" ...").split()[-1] in older.split()
+    assert budgeted.tokens <= budget
+    assert budgeted.tokens + budgeted.tokens_saved == sum(
+        estimate_tokens(comment)
+        for comment in [newest, older, "Oldest comment"]
+    )
+
+
+def test_fit_comments_skips_truncation_when_too_little_is_left() -> None:
+    newest = "Wide doors and a lift to every floor"
+    older = " ".join(f"word{i}" for i in range(200))
+    budget = estimate_tokens(newest) + MIN_TRUNCATED_TOKENS - 1
+
+    budgeted = fit_comments([newest, older], budget=budget)
+
+    assert budgeted.comments == [newest]
+
+
+def test_parse_batch_answer() -> None:
+    answer = '```json\n{"1": "FULL", "2": " partial ", "4": "NONE"}\n```'
+
+    assert parse_batch_answer(answer, count=4) == [
+        NodeAccessibility.FULL,
+        NodeAccessibility.PARTIAL,
+        None,
+        NodeAccessibility.NONE,
+    ]
+
+
+def test_parse_batch_answer_skips_unreadable_levels() -> None:
+    answer = '{"1": "SOMETIMES", "2": 3, "3": null, "4": ["FULL"], "5": "full"}'
+
+    assert parse_batch_answer(answer, count=5) == [
+        None,
+        None,
+        None,
+        None,
+        NodeAccessibility.FULL,
+    ]
+
+
+@pytest.mark.parametrize("answer", ["FULL", '["FULL"]', '{"1": ', ""])
+def test_parse_batch_answer_without_object(answer: str) -> None:
+    assert parse_batch_answer(answer, count=2) == [None, None]
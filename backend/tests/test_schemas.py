@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.routes.core.schemas import ItemCursor
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        datetime(2026, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        datetime(2026, 5, 1, 12, 30, tzinfo=timezone(timedelta(hours=2))),
+        datetime(2026, 5, 1),
+    ],
+)
+def test_item_cursor_round_trip(created_at: datetime) -> None:
+    cursor = ItemCursor(created_at=created_at, id=42)
+
+    parsed = ItemCursor.from_string(cursor.to_string())
+
+    assert parsed == cursor
+    assert parsed.created_at.utcoffset() == created_at.utcoffset()
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["", "42", "2026-05-01T12:30:00+00:00", "yesterday,42", "2026-05-01,x"],
+)
+def test_item_cursor_from_invalid_string(value: str) -> None:
+    with pytest.raises(ValueError):
+        ItemCursor.from_string(value)
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+from api.common.text_classifier import LinearClassifier
+
+LABELS = ["full", "partial", "none"]
+EXAMPLES = [
+    ("Wide ramp at the entrance and an elevator", "full"),
+    ("Step free entrance, accessible toilet", "full"),
+    ("One small step at the door", "partial"),
+    ("Ramp at the back, but narrow doors", "partial"),
+    ("Only stairs, no ramp", "none"),
+    ("Steep stairs and no elevator", "none"),
+]
+
+
+def test_fit_and_classify() -> None:
+    classifier = LinearClassifier.fit(EXAMPLES * 10, LABELS)
+
+    assert classifier.examples == 60
+    for text, label in EXAMPLES:
+        predicted, confidence = classifier.classify(text)
+        assert predicted == label
+        assert 1 / len(LABELS) < confidence <= 1
+
+
+def test_fit_is_deterministic() -> None:
+    first = LinearClassifier.fit(EXAMPLES, LABELS)
+    second = LinearClassifier.fit(EXAMPLES, LABELS)
+
+    assert first.weights == second.weights
+    assert first.bias == second.bias
+
+
+def test_imports_nothing_from_the_app() -> None:
+    # The training process only loads what this module imports.
+    code = (
+        "import sys, api.common.text_classifier; "
+        "print(sorted(m for m in sys.modules if m.startswith('api')))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+
+    assert result.stdout.strip() == str(
+        ["api", "api.common", "api.common.text_classifier"]
+    )
@@ -14,6 +14,9 @@ export const API_ENDPOINTS = {
     DISABILITIES: `${API_URL}/disabilities`,
   },
   NODES: `${API_URL}/nodes`,
+  NODES_BATCH_GET: `${API_URL}/nodes:batchGet`,
+  NODE: (osmId) => `${API_URL}/nodes/${osmId}`,
+  NODE_COMMENTS: (osmId) => `${API_URL}/nodes/${osmId}/comments`,
   ADD_COMMENT: `${API_URL}/comments`,
   ADD_PROPOSAL: `${API_URL}/accessibility_propositions`,
 }
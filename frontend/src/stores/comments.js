@@ -7,8 +7,10 @@ import axios from 'axios'
 export const useCommentsStore = defineStore('comments', () => {
   const commentsByNode = ref({})
   const accessibilityByNode = ref({})
+  // Cursor of the next page of older comments, for nodes that have more
+  const olderCommentsCursor = ref({})
 
-  function addComment(nodeId, comment, stars) {
+  function addComment(nodeId, comment, stars, location = {}) {
     // Save locally
     if (!commentsByNode.value[nodeId]) {
       commentsByNode.value[nodeId] = []
@@ -26,6 +28,8 @@ export const useCommentsStore = defineStore('comments', () => {
       .post(API_ENDPOINTS.ADD_COMMENT, {
         osm_id: nodeId,
         text: comment,
+        lat: location.lat,
+        lon: location.lon,
       })
       .catch((err) => {
         console.error('Failed to post comment:', err)
@@ -46,13 +50,15 @@ export const useCommentsStore = defineStore('comments', () => {
   }
 
   // New method to add proposals
-  function addProposal(nodeId, text, accessibility) {
+  function addProposal(nodeId, text, accessibility, location = {}) {
     // Send the proposal to the backend
     axios
       .post(API_ENDPOINTS.ADD_PROPOSAL, {
         osm_id: nodeId,
         text: text,
         accessibility: accessibility,
+        lat: location.lat,
+        lon: location.lon,
       })
       .then((response) => {
         console.log('Proposal successfully sent:', response.data)
@@ -66,30 +72,60 @@ export const useCommentsStore = defineStore('comments', () => {
     return accessibilityByNode.value[nodeId]
   }
 
-  async function fetchAllComments() {
-    try {
-      const response = await axios.get(API_ENDPOINTS.NODES)
-      const data = response.data
+  function toComment(comment) {
+    return {
+      id: comment.id,
+      text: comment.text,
+      stars: Math.floor(Math.random() * 5) + 1, // assuming stars are not in API
+      user: comment.user,
+      createdAt: new Date(comment.created_at),
+    }
+  }
+
+  function storeNode(entry) {
+    const nodeId = entry.osm_id
+    accessibilityByNode.value[nodeId] = entry.accessibility
+    commentsByNode.value[nodeId] = entry.comments.map(toComment)
+  }
+
+  function hasOlderComments(nodeId) {
+    return Boolean(olderCommentsCursor.value[nodeId])
+  }
 
-      data.forEach((entry) => {
-        const nodeId = entry.osm_id
-        const comments = entry.comments.map((comment) => ({
-          id: comment.id,
-          text: comment.text,
-          stars: Math.floor(Math.random() * 5) + 1, // assuming stars are not in API
-          user: comment.user,
-          createdAt: new Date(comment.created_at),
-        }))
-        console.log(entry.accessibility)
-        accessibilityByNode.value[nodeId] = entry.accessibility
-        commentsByNode.value[nodeId] = comments
+  async function fetchOlderComments(nodeId) {
+    const before = olderCommentsCursor.value[nodeId]
+    if (!before) {
+      return
+    }
+    try {
+      const response = await axios.get(API_ENDPOINTS.NODE_COMMENTS(nodeId), {
+        params: { before, limit: 20 },
       })
+      commentsByNode.value[nodeId] = [
+        ...(commentsByNode.value[nodeId] || []),
+        ...response.data.comments.map(toComment),
+      ]
+      olderCommentsCursor.value[nodeId] = response.data.next_before
     } catch (error) {
-      console.error('Failed to fetch comments:', error)
+      console.error('Failed to fetch older comments:', error)
     }
   }
 
-  fetchAllComments()
+  async function fetchNodeComments(nodeId) {
+    try {
+      const response = await axios.get(API_ENDPOINTS.NODE(nodeId))
+      const node = response.data
+      storeNode(node)
+      // Nodes only embed their latest comments, older ones are loaded on demand
+      const last = node.comments[node.comments.length - 1]
+      olderCommentsCursor.value[nodeId] =
+        node.comments.length < node.comments_count ? `${last.created_at},${last.id}` : null
+    } catch (error) {
+      if (error.response?.status !== 404) {
+        console.error('Failed to fetch node comments:', error)
+      }
+    }
+  }
 
   return {
     commentsByNode,
@@ -97,5 +133,8 @@ export const useCommentsStore = defineStore('comments', () => {
     addComment,
     getComments,
     addProposal,
+    fetchNodeComments,
+    hasOlderComments,
+    fetchOlderComments,
   }
 })
@@ -17,9 +17,20 @@ export const useNodesStore = defineStore('nodes', () => {
     }
   }
 
-  fetchAllNodes()
+  async function fetchNodesByIds(osmIds) {
+    try {
+      const response = await axios.post(API_ENDPOINTS.NODES_BATCH_GET, {
+        osm_ids: osmIds,
+      })
+      return response.data.nodes
+    } catch (error) {
+      console.error('Failed to fetch nodes:', error)
+      return []
+    }
+  }
 
   return {
-    fetchAllNodes
+    fetchAllNodes,
+    fetchNodesByIds,
   }
 })